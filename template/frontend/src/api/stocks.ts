@@ -1,4 +1,4 @@
-import { useQuery } from '@tanstack/react-query'
+import { useQueries, useQuery } from '@tanstack/react-query'
 import { apiFetch } from '@/lib/api'
 
 export interface StockData {
@@ -9,34 +9,55 @@ export interface StockData {
   date: string
 }
 
+export interface StockPoint {
+  symbol: string
+  date: string
+  price: number
+  volume: number
+}
+
+// Most points requested per symbol; the server downsamples longer histories
+const SERIES_POINTS = 500
+
 // Query keys factory for better organization
 export const stockKeys = {
   all: ['stocks'] as const,
-  lists: () => [...stockKeys.all, 'list'] as const,
-  list: (filters?: { symbol?: string }) => 
-    [...stockKeys.lists(), filters] as const,
+  series: (symbol: string) => [...stockKeys.all, 'series', symbol] as const,
   symbols: () => [...stockKeys.all, 'symbols'] as const,
+  latest: () => [...stockKeys.all, 'latest'] as const,
 }
 
 // API functions
-async function fetchStocks(symbol?: string): Promise<StockData[]> {
-  return apiFetch<StockData[]>('/api/v1/example/stocks', {
-    params: symbol ? { symbol } : undefined,
-  })
+async function fetchStockSeries(symbol: string): Promise<StockPoint[]> {
+  const points = await apiFetch<Omit<StockPoint, 'symbol'>[]>(
+    '/api/v1/example/stocks/series',
+    { params: { symbol, points: SERIES_POINTS } }
+  )
+  return points.map(point => ({ ...point, symbol }))
 }
 
 async function fetchStockSymbols(): Promise<string[]> {
-  const stocks = await apiFetch<StockData[]>('/api/v1/example/stocks')
-  return [...new Set(stocks.map(stock => stock.symbol))].sort()
+  return apiFetch<string[]>('/api/v1/example/stocks/symbols')
+}
+
+async function fetchLatestStocks(): Promise<StockData[]> {
+  return apiFetch<StockData[]>('/api/v1/example/stocks/latest')
 }
 
 // Custom hooks
-export function useStocks(symbol?: string) {
-  return useQuery({
-    queryKey: stockKeys.list({ symbol }),
-    queryFn: () => fetchStocks(symbol),
-    // Stock data is considered fresh for 30 seconds (inherited from queryClient)
-    // but we can override here if needed
+// Chart history of each symbol, one bounded request per symbol however long the history
+export function useStockSeries(symbols: string[]) {
+  return useQueries({
+    queries: symbols.map(symbol => ({
+      queryKey: stockKeys.series(symbol),
+      queryFn: () => fetchStockSeries(symbol),
+      // Stock data is considered fresh for 30 seconds (inherited from queryClient)
+    })),
+    combine: results => ({
+      data: results.flatMap(result => result.data ?? []),
+      isLoading: results.some(result => result.isLoading),
+      refetch: () => Promise.all(results.map(result => result.refetch())),
+    }),
   })
 }
 
@@ -47,4 +68,12 @@ export function useStockSymbols() {
     staleTime: 5 * 60 * 1000, // Symbols change less frequently, so 5 minutes
     gcTime: 10 * 60 * 1000, // Keep in cache for 10 minutes
   })
-}
\ No newline at end of file
+}
+
+// Latest quote of each symbol, one row per symbol however much history is stored
+export function useLatestStocks() {
+  return useQuery({
+    queryKey: stockKeys.latest(),
+    queryFn: fetchLatestStocks,
+  })
+}
@@ -4,7 +4,7 @@ import { ArrowClockwiseIcon } from '@phosphor-icons/react'
 import { Button } from '@/components/ui/button'
 import { useAuthStore } from '@/stores/authStore'
 import { useThemeStore } from '@/stores/themeStore'
-import { useStocks, useStockSymbols } from '@/api/stocks'
+import { useLatestStocks, useStockSeries, useStockSymbols } from '@/api/stocks'
 
 export const Dashboard: React.FC = () => {
   const user = useAuthStore((state) => state.user)
@@ -12,8 +12,10 @@ export const Dashboard: React.FC = () => {
   const [selectedSymbol, setSelectedSymbol] = useState<string>('')
   
   // Use TanStack Query hooks
-  const { data: stockData = [], isLoading, refetch } = useStocks(selectedSymbol || undefined)
   const { data: availableSymbols = [] } = useStockSymbols()
+  const { data: latestStocks = [] } = useLatestStocks()
+  const symbolsToDisplay = selectedSymbol ? [selectedSymbol] : availableSymbols
+  const { data: stockData, isLoading, refetch } = useStockSeries(symbolsToDisplay)
   
   // Chart theme based on mode
   const chartTheme = React.useMemo(() => ({
@@ -49,8 +51,6 @@ export const Dashboard: React.FC = () => {
     )
   }, [stockData])
 
-  const symbolsToDisplay = selectedSymbol ? [selectedSymbol] : availableSymbols
-
   return (
     <div className="w-full p-6 bg-background">
       <h2 className="text-3xl font-bold mb-4 text-foreground">Dashboard</h2>
@@ -86,6 +86,16 @@ export const Dashboard: React.FC = () => {
           </select>
         </div>
 
+        <div className="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
+          {latestStocks.map(stock => (
+            <div key={stock.symbol} className="rounded-md border border-border p-3">
+              <div className="text-sm text-muted-foreground">{stock.symbol}</div>
+              <div className="text-lg font-semibold text-foreground">${stock.price}</div>
+              <div className="text-xs text-muted-foreground">{stock.date}</div>
+            </div>
+          ))}
+        </div>
+
         <div className="space-y-8">
           <div>
             <h3 className="text-lg font-semibold mb-4 text-foreground">Stock Prices Over Time</h3>
@@ -125,6 +135,7 @@ export const Dashboard: React.FC = () => {
                     stroke={chartTheme.colors[index % chartTheme.colors.length]}
                     strokeWidth={2}
                     dot={false}
+                    connectNulls
                     activeDot={{ r: 4 }}
                   />
                 ))}
@@ -2,6 +2,8 @@ from django.conf import settings
 from ninja import NinjaAPI
 from ninja.security import APIKeyHeader, SessionAuthIsStaff
 
+from core.renderers import ORJSONParser, ORJSONRenderer
+
 from .v1.router import router as v1_router
 
 
@@ -15,6 +17,7 @@ class ApiKey(APIKeyHeader):
 
 api = NinjaAPI(
     auth=[ApiKey(), SessionAuthIsStaff()],
+    renderer=ORJSONRenderer(),
+    parser=ORJSONParser(),
 )
-
 api.add_router("/v1", v1_router)
@@ -1,14 +1,44 @@
+from datetime import date, datetime
 from typing import List, Optional
 
-from ninja import Router
+from django.db import DataError
+from django.db.models import Q
+from django.http import HttpResponse
+from ninja import File, Query, Router
+from ninja.files import UploadedFile
+from ninja.errors import HttpError
 
-from core.models import StockTicker
+from core import columnar
+from core.downsample import lttb
+from core.ingest import detect_format, ingest_tickers
+from core.models import StockRollup, StockTicker
+from core.response_cache import cached_response
+from core.stocks import (
+    decode_stock_cursor,
+    distinct_symbols,
+    encode_stock_cursor,
+    latest_tickers,
+)
 
-from .schemas import GreetOutput, StockTickerOut
+from .schemas import (
+    GreetOutput,
+    StockIngestOut,
+    StockPointOut,
+    StockRollupOut,
+    StockTickerOut,
+)
 
 
 router = Router()
 
+MAX_STOCKS_PAGE_SIZE = 1000
+MAX_OHLC_BARS = 1000
+MAX_SERIES_POINTS = 5000
+
+# Columns read with values_list, in schema order
+STOCK_FIELDS = list(StockTickerOut.model_fields)
+SERIES_FIELDS = list(StockPointOut.model_fields)
+
 
 @router.post("/greet", response=GreetOutput)
 def greet(request, name: str = "world"):
@@ -16,14 +46,171 @@ def greet(request, name: str = "world"):
 
 
 @router.get("/stocks", response=List[StockTickerOut])
-def get_stocks(request, symbol: Optional[str] = None):
+@cached_response(List[StockTickerOut], StockTicker)
+def get_stocks(
+    request,
+    response: HttpResponse,
+    symbol: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
     """
-    Get stock ticker data.
+    Get stock ticker data, newest first, one page at a time.
     If symbol is provided, returns data for that specific stock.
+
+    Pages are keyset-paginated on (date, symbol) and served from an index, so
+    every page costs the same however much history is stored. When more rows
+    exist, the cursor for the next page is returned in the ``X-Next-Cursor``
+    header. Responses carry an ETag that changes whenever tickers are written;
+    send it back in ``If-None-Match`` to get a 304 while nothing has changed.
+
+    Args:
+        start_date: Only include days on or after this date
+        end_date: Only include days on or before this date
+        limit: Page size (default: 100, max: 1000)
+        cursor: ``X-Next-Cursor`` of the previous page
     """
-    queryset = StockTicker.objects
+    queryset = StockTicker.objects.order_by("-date", "symbol")
 
     if symbol:
         queryset = queryset.filter(symbol=symbol.upper())
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    if cursor:
+        try:
+            after_date, after_symbol = decode_stock_cursor(cursor)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        queryset = queryset.filter(
+            Q(date__lt=after_date) | Q(date=after_date, symbol__gt=after_symbol)
+        )
+
+    limit = max(1, min(limit, MAX_STOCKS_PAGE_SIZE))
+    # Fetch one extra row to learn whether another page exists
+    rows = list(queryset.values_list(*STOCK_FIELDS)[: limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(STOCK_FIELDS, rows[-1]))
+        response["X-Next-Cursor"] = encode_stock_cursor(last["date"], last["symbol"])
+
+    media_type = columnar.negotiate(request)
+    if media_type:
+        return columnar.columnar_response(media_type, STOCK_FIELDS, rows, response)
+    return [dict(zip(STOCK_FIELDS, row)) for row in rows]
+
+
+@router.post("/stocks/ingest", response=StockIngestOut)
+def ingest_stocks(
+    request, file: UploadedFile = File(...), format: Optional[str] = None
+):
+    """
+    Bulk load stock data from a CSV (with a header row) or NDJSON upload.
+    Rows are upserted on (symbol, date); the whole upload loads or none of it.
+
+    Args:
+        file: Rows with symbol, company_name, price, change, percent_change,
+            volume, date and optionally market_cap
+        format: ``csv`` or ``ndjson`` (default: guessed from the file name)
+    """
+    fmt = format or detect_format(file.name or "", file.content_type or "")
+    try:
+        rows_loaded = ingest_tickers(file, fmt)
+    except (ValueError, DataError) as e:
+        raise HttpError(400, str(e))
+    return {"rows_loaded": rows_loaded}
+
+
+@router.get("/stocks/symbols", response=List[str])
+@cached_response(List[str], StockTicker)
+def get_stock_symbols(request):
+    """
+    Get every symbol with stored stock data, sorted.
+    """
+    return distinct_symbols()
+
+
+@router.get("/stocks/latest", response=List[StockTickerOut])
+@cached_response(List[StockTickerOut], StockTicker)
+def get_latest_stocks(request, symbol: Optional[List[str]] = Query(None)):
+    """
+    Get the latest stock data of each symbol, ordered by symbol.
+    If symbol is provided (repeatable), returns only those stocks.
+    """
+    symbols = [s.upper() for s in symbol] if symbol else None
+    rows = latest_tickers(symbols).values_list(*STOCK_FIELDS)
+
+    media_type = columnar.negotiate(request)
+    if media_type:
+        return columnar.columnar_response(media_type, STOCK_FIELDS, list(rows))
+    return [dict(zip(STOCK_FIELDS, row)) for row in rows]
+
+
+@router.get("/stocks/series", response=List[StockPointOut])
+@cached_response(List[StockPointOut], StockTicker)
+def get_stock_series(
+    request,
+    symbol: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    points: int = 500,
+):
+    """
+    Get a stock's price history, oldest first, downsampled for charting.
+    Returns at most ``points`` points (default: 500, max: 5000) whatever the
+    range, chosen by largest-triangle-three-buckets so peaks and troughs are kept.
+    """
+    queryset = StockTicker.objects.filter(symbol=symbol.upper())
+
+    if start:
+        queryset = queryset.filter(date__gte=start)
+    if end:
+        queryset = queryset.filter(date__lte=end)
+
+    rows = list(queryset.order_by("date").values_list(*SERIES_FIELDS))
+    if rows:
+        dates, prices, _ = zip(*rows)
+        keep = lttb(
+            [day.toordinal() for day in dates],
+            [float(price) for price in prices],
+            max(3, min(points, MAX_SERIES_POINTS)),
+        )
+        rows = [rows[i] for i in keep]
+
+    media_type = columnar.negotiate(request)
+    if media_type:
+        return columnar.columnar_response(media_type, SERIES_FIELDS, rows)
+    return [dict(zip(SERIES_FIELDS, row)) for row in rows]
+
+
+@router.get("/stocks/ohlc", response=List[StockRollupOut])
+@cached_response(List[StockRollupOut], StockRollup)
+def get_stock_ohlc(
+    request,
+    symbol: str,
+    interval: StockRollup.Interval = StockRollup.Interval.HOUR,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 500,
+):
+    """
+    Get OHLC bars for a stock, oldest first, from the pre-aggregated rollups.
+    Returns the first ``limit`` bars from ``start`` if given, else the latest
+    ``limit`` bars. Bars are refreshed by the data aggregation task.
+    """
+    queryset = StockRollup.objects.filter(symbol=symbol.upper(), interval=interval)
+
+    if start:
+        queryset = queryset.filter(bucket_start__gte=start)
+    if end:
+        queryset = queryset.filter(bucket_start__lt=end)
 
-    return queryset
+    limit = max(1, min(limit, MAX_OHLC_BARS))
+    if start:
+        return queryset.order_by("bucket_start")[:limit]
+    bars = list(queryset.order_by("-bucket_start")[:limit])
+    bars.reverse()
+    return bars
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 
 from ninja import Schema
 
@@ -13,5 +13,27 @@ class StockTickerOut(Schema):
     date: date
 
 
+class StockPointOut(Schema):
+    date: date
+    price: float
+    volume: int
+
+
+class StockRollupOut(Schema):
+    symbol: str
+    interval: str
+    bucket_start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    count: int
+
+
+class StockIngestOut(Schema):
+    rows_loaded: int
+
+
 class GreetOutput(Schema):
     message: str
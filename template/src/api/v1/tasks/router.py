@@ -1,43 +1,105 @@
+import asyncio
 import random
-import time
-from datetime import datetime, timezone
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
 from pprint import pprint
+from typing import Any, Dict, List, Optional
 
 import structlog
-from dbos import DBOS
-from ninja import Router
+from dbos import DBOS, SetWorkflowID
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from ninja import Query, Router
+from ninja.errors import HttpError
 
 from .schemas import (
+    BulkCancelProgress,
+    BulkCancelRequest,
+    BulkCancelResponse,
+    LatencyPercentiles,
+    WorkflowMetrics,
+    WorkflowMetricsResponse,
+    QueueInfo,
+    QueueStatsResponse,
     WorkflowResult,
+    WorkflowResultsRequest,
+    WorkflowResultsResponse,
     WorkflowStatusResponse,
     WorkflowInfo,
     WorkflowListResponse,
     WorkflowDetailResponse,
     WorkflowStepInfo,
+    WorkflowStepOutput,
 )
-from core.cron_jobs import data_aggregation_task
+from core import workflow_export, workflow_queries
+from core.aio import dbos_async_view
+from core.bulk_cancel import PROGRESS_EVENT, bulk_cancel_workflows
+from core.cron_jobs import data_aggregation_task, parse_time_range
+from core.idempotency import get_idempotency_key, idempotent_workflow_id
+from core.queues import QUEUES, aggregation_queue, enqueue_bulk_async
+from core.renderers import render_schema_results
+from core.workflow_cache import workflow_cache
+from core.workflow_feed import get_feed
 
 
 router = Router()
 logger = structlog.get_logger(__name__)
 
+MAX_LIST_LIMIT = 1000
+MAX_BULK_COUNT = 10000
+MAX_RESULTS_BATCH = 1000
+MAX_AWAIT_SECONDS = 60
+
+
+@DBOS.step()
+async def simulated_io_step(seconds: int) -> int:
+    # Stands in for network I/O; awaiting frees the event loop for other workflows
+    await asyncio.sleep(seconds)
+    return seconds
+
 
 @DBOS.workflow()
-def test_job_workflow():
+async def test_job_workflow():
+    """
+    Example coroutine workflow.
+
+    DBOS runs async workflows on its own event loop, so thousands of them can
+    wait concurrently without holding a thread each.
+    """
     seconds = random.randint(1, 5)
     logger.info("test_job_sleeping", seconds=seconds)
-    time.sleep(seconds)
+    await simulated_io_step(seconds)
     result = {"message": "Job completed", "seconds": seconds}
     pprint(result)
     return result
 
 
 @router.post("/test", summary="Submit Test Job(s)")
-def test_job(request, count: int = 1):
-    workflow_ids = []
-    for _ in range(count):
-        workflow_handle = DBOS.start_workflow(test_job_workflow)
-        workflow_ids.append(workflow_handle.get_workflow_id())
+@dbos_async_view
+async def test_job(request, count: int = 1, idempotency_key: Optional[str] = None):
+    """
+    Enqueue ``count`` test jobs on the bulk queue and return their IDs immediately.
+
+    Resubmitting with the same ``Idempotency-Key`` header (or
+    ``idempotency_key``) returns the jobs of the first submission instead of
+    queueing new ones.
+    """
+    count = max(1, min(count, MAX_BULK_COUNT))
+    try:
+        key = get_idempotency_key(request, idempotency_key)
+    except ValueError as e:
+        return {"message": "Error queueing jobs", "error": str(e)}
+
+    workflow_ids = None
+    if key:
+        base_id = idempotent_workflow_id(request, "test", key)
+        workflow_ids = (
+            [base_id] if count == 1 else [f"{base_id}-{i}" for i in range(count)]
+        )
+    workflow_ids = await enqueue_bulk_async(
+        test_job_workflow, [()] * count, workflow_ids=workflow_ids
+    )
 
     return {
         "message": "Jobs queued",
@@ -45,11 +107,11 @@ def test_job(request, count: int = 1):
     }
 
 
-@router.get("/result", response=WorkflowResult, summary="Get Workflow Result")
-def get_result(request, workflow_id: str):
+async def _workflow_result(workflow_id: str) -> WorkflowResult:
+    """Build a workflow's result response, caching it once the workflow has finished."""
     try:
-        handle = DBOS.retrieve_workflow(workflow_id)
-        status = handle.get_status()
+        handle = await DBOS.retrieve_workflow_async(workflow_id)
+        status = await handle.get_status()
 
         # Only get result if workflow is complete
         result = None
@@ -61,7 +123,7 @@ def get_result(request, workflow_id: str):
         ]
         if is_complete:
             try:
-                result = handle.get_result()
+                result = await handle.get_result()
             except Exception as e:
                 result = f"Error getting result: {str(e)}"
 
@@ -70,7 +132,7 @@ def get_result(request, workflow_id: str):
         if status and hasattr(status, "input"):
             workflow_input = status.input
 
-        return WorkflowResult(
+        response = WorkflowResult(
             workflow_id=workflow_id,
             status=(
                 status.status if status else "UNKNOWN"
@@ -88,6 +150,8 @@ def get_result(request, workflow_id: str):
             ),
             input=workflow_input,
         )
+        await workflow_cache.aset("result", workflow_id, response.status, response)
+        return response
     except Exception as e:
         logger.error("workflow_retrieve_failed", workflow_id=workflow_id, error=str(e), exc_info=True)
         return WorkflowResult(
@@ -100,43 +164,159 @@ def get_result(request, workflow_id: str):
         )
 
 
-@router.get("/list", response=WorkflowListResponse, summary="List Workflows")
-def list_workflows(request, limit: int = 1000):
+@router.get("/result", response=WorkflowResult, summary="Get Workflow Result")
+@dbos_async_view
+async def get_result(request, workflow_id: str):
     """
-    List recent workflows with their status.
+    Get a workflow's status and, once it has finished, its result.
+
+    Results of finished workflows are cached, since they can no longer change.
+    """
+    cached = await workflow_cache.aget("result", workflow_id)
+    if cached is not None:
+        return cached
+    return await _workflow_result(workflow_id)
+
+
+@router.get("/result/await", response=WorkflowResult, summary="Await Workflow Result")
+@dbos_async_view
+async def await_result(request, workflow_id: str, wait: float = 30):
+    """
+    Long-poll for a workflow's result.
+
+    Returns as soon as the workflow reaches a terminal status, or with its
+    current status once ``wait`` seconds have passed, so clients can loop on
+    this endpoint instead of polling ``/result``. Waiting is driven by the
+    process-wide change feed: the workflow's status is only re-read when the
+    feed sees it change. Under WSGI a waiting request holds a worker thread.
 
     Args:
-        limit: Maximum number of workflows to retrieve (default: 1000)
+        workflow_id: The workflow to wait for
+        wait: Seconds to wait at most (default: 30, max: 60)
+    """
+    cached = await workflow_cache.aget("result", workflow_id)
+    if cached is not None:
+        return cached
+
+    async def finished() -> bool:
+        status = await DBOS.get_workflow_status_async(workflow_id)
+        return status is not None and status.status in workflow_queries.TERMINAL_STATUSES
+
+    try:
+        await get_feed().wait_for_workflow(
+            workflow_id, finished, timeout=max(0.0, min(wait, MAX_AWAIT_SECONDS))
+        )
+    except Exception as e:
+        logger.warning("workflow_await_failed", workflow_id=workflow_id, error=str(e))
+    return await _workflow_result(workflow_id)
+
+
+@router.post(
+    "/results", response=WorkflowResultsResponse, summary="Get Workflow Results in Bulk"
+)
+async def get_results(request, payload: WorkflowResultsRequest):
+    """
+    Get status, timestamps and results for many workflows in one call.
+
+    Looks all workflows up with a single set-based query instead of one
+    retrieve/status/result round trip per workflow.
     """
+    workflow_ids = payload.workflow_ids[:MAX_RESULTS_BATCH]
     try:
-        # Use the DBOS instance initialized in apps.py
-        # List recent workflows directly using DBOS, sorted by most recent first
-        workflow_list = DBOS.list_workflows(limit=limit, sort_desc=True)
-
-        workflows = []
-        for wf in workflow_list:
-            workflows.append(
-                WorkflowInfo(
-                    workflow_id=wf.workflow_id,
-                    name=wf.name,  # WorkflowStatus has 'name' attribute for the function name
-                    status=wf.status,  # Status is already a string, not an enum
-                    created_at=(
-                        datetime.fromtimestamp(wf.created_at / 1000, tz=timezone.utc)
-                        if wf.created_at
-                        else None
-                    ),  # Convert from ms timestamp to UTC
-                    updated_at=(
-                        datetime.fromtimestamp(wf.updated_at / 1000, tz=timezone.utc)
-                        if wf.updated_at
+        rows = await asyncio.to_thread(
+            workflow_queries.get_workflow_outcomes,
+            workflow_ids,
+            only_terminal=payload.only_terminal,
+        )
+
+        results = []
+        for row in rows:
+            is_complete = row["status"] in workflow_queries.TERMINAL_STATUSES
+            results.append(
+                WorkflowResult(
+                    workflow_id=row["workflow_uuid"],
+                    status=row["status"],
+                    result=row["output"] if is_complete else None,
+                    error=row["error"] if is_complete else None,
+                    started=workflow_queries.from_epoch_ms(row["created_at"]),
+                    completed=(
+                        workflow_queries.from_epoch_ms(row["updated_at"])
+                        if is_complete
                         else None
-                    ),  # Convert from ms timestamp to UTC
-                    app_version=wf.app_version if hasattr(wf, "app_version") else None,
+                    ),
                 )
             )
 
+        found = {result.workflow_id for result in results}
+        return WorkflowResultsResponse(
+            results=results,
+            missing=[
+                workflow_id for workflow_id in workflow_ids if workflow_id not in found
+            ],
+            message="Successfully retrieved workflow results",
+        )
+    except Exception as e:
+        logger.error("workflow_results_failed", error=str(e), exc_info=True)
+        return WorkflowResultsResponse(results=[], message=f"Error: {str(e)}")
+
+
+@router.get("/list", response=WorkflowListResponse, summary="List Workflows")
+# Pages of up to MAX_LIST_LIMIT rows are serialized once, without re-validation
+@render_schema_results
+async def list_workflows(
+    request,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    workflow_id_prefix: Optional[str] = None,
+):
+    """
+    List workflows, most recent first, one page at a time.
+
+    Filtering happens in the database and pages are keyset-paginated on
+    (created_at, workflow_id), so the cost of a page does not depend on how
+    much history exists. Workflow inputs and outputs are not loaded.
+
+    Args:
+        limit: Page size (default: 100, max: 1000)
+        cursor: ``next_cursor`` from the previous page
+        status: Only include workflows in these statuses (repeatable)
+        name: Only include workflows with this function name
+        start_time: Only include workflows created at or after this time
+        end_time: Only include workflows created before this time
+        workflow_id_prefix: Only include workflows whose ID starts with this
+    """
+    try:
+        rows, next_cursor = await asyncio.to_thread(
+            workflow_queries.list_workflow_page,
+            limit=max(1, min(limit, MAX_LIST_LIMIT)),
+            cursor=cursor,
+            status=status,
+            name=name,
+            start_time=start_time,
+            end_time=end_time,
+            workflow_id_prefix=workflow_id_prefix,
+        )
+
+        workflows = [
+            WorkflowInfo(
+                workflow_id=row["workflow_uuid"],
+                name=row["name"],
+                status=row["status"],
+                created_at=workflow_queries.from_epoch_ms(row["created_at"]),
+                updated_at=workflow_queries.from_epoch_ms(row["updated_at"]),
+                app_version=row["application_version"],
+            )
+            for row in rows
+        ]
+
         return WorkflowListResponse(
             workflows=workflows,
             total_count=len(workflows),
+            next_cursor=next_cursor,
             message="Successfully retrieved workflows",
         )
     except Exception as e:
@@ -149,47 +329,45 @@ def list_workflows(request, limit: int = 1000):
 @router.get(
     "/status", response=WorkflowStatusResponse, summary="Get Workflow Status Overview"
 )
-def workflow_status(request, limit: int = 10000):
+async def workflow_status(
+    request,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+):
     """
-    Get an overview of workflow status including queued workflows.
+    Get exact workflow counts by status, including queued workflows.
+
+    Counts are computed with a single GROUP BY over the DBOS system tables
+    rather than by loading workflows into Python. The GROUP BY reads every
+    workflow in the window, so it is bounded by default.
 
     Args:
-        limit: Maximum number of workflows to retrieve (default: 10000)
+        start_time: Only count workflows created at or after this time;
+            defaults to ``WORKFLOW_STATUS_WINDOW_HOURS`` ago
+        end_time: Only count workflows created before this time
     """
+    if start_time is None:
+        start_time = datetime.now(timezone.utc) - timedelta(
+            hours=getattr(settings, "WORKFLOW_STATUS_WINDOW_HOURS", 24)
+        )
     try:
-        # Use the DBOS instance initialized in apps.py
-        # Get counts directly using DBOS, sorted by most recent first
-        all_workflows = DBOS.list_workflows(limit=limit, sort_desc=True)
-        queued = DBOS.list_queued_workflows()
-
-        # Count workflows by status
-        status_counts = {
-            "PENDING": 0,
-            "SUCCESS": 0,
-            "ERROR": 0,
-            "MAX_RECOVERY_ATTEMPTS_EXCEEDED": 0,
-            "CANCELLED": 0,
-            "ENQUEUED": 0,
-        }
-
-        for wf in all_workflows:
-            if wf.status in status_counts:
-                status_counts[wf.status] += 1
-
-        # Enqueued workflows are those in the queue
-        status_counts["ENQUEUED"] = len(queued)
+        counts, queued = await asyncio.to_thread(
+            workflow_queries.count_workflows_by_status,
+            start_time=start_time,
+            end_time=end_time,
+        )
 
         return WorkflowStatusResponse(
-            total_workflows=len(all_workflows),
-            queued_workflows=len(queued),
-            pending=status_counts["PENDING"],
-            success=status_counts["SUCCESS"],
-            error=status_counts["ERROR"],
-            max_recovery_attempts_exceeded=status_counts[
-                "MAX_RECOVERY_ATTEMPTS_EXCEEDED"
-            ],
-            cancelled=status_counts["CANCELLED"],
-            enqueued=status_counts["ENQUEUED"],
+            total_workflows=sum(counts.values()),
+            queued_workflows=queued,
+            pending=counts.get("PENDING", 0),
+            success=counts.get("SUCCESS", 0),
+            error=counts.get("ERROR", 0),
+            max_recovery_attempts_exceeded=counts.get(
+                "MAX_RECOVERY_ATTEMPTS_EXCEEDED", 0
+            ),
+            cancelled=counts.get("CANCELLED", 0),
+            enqueued=counts.get("ENQUEUED", 0),
             timestamp=datetime.now().strftime("%H:%M:%S"),
             message="DBOS workflows are running",
         )
@@ -209,20 +387,215 @@ def workflow_status(request, limit: int = 10000):
         )
 
 
+@router.get(
+    "/metrics", response=WorkflowMetricsResponse, summary="Get Workflow Metrics"
+)
+async def workflow_metrics(
+    request,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    name: Optional[str] = None,
+):
+    """
+    Get queue wait and execution time percentiles, throughput and error rate per workflow name.
+
+    Covers finished workflows created within the window. Durations are in
+    milliseconds; queue wait is only reported for workflows run from a queue.
+
+    Args:
+        start_time: Start of the window (default: one hour before ``end_time``)
+        end_time: End of the window (default: now)
+        name: Only report on workflows with this function name
+    """
+    end_time = end_time or datetime.now(timezone.utc)
+    start_time = start_time or end_time - timedelta(hours=1)
+    try:
+        rows = await asyncio.to_thread(
+            workflow_queries.workflow_metrics,
+            start_time=start_time,
+            end_time=end_time,
+            name=name,
+        )
+
+        minutes = max((end_time - start_time).total_seconds() / 60, 1 / 60)
+        metrics = [
+            WorkflowMetrics(
+                name=row["name"],
+                completed=row["completed"],
+                errors=row["errors"],
+                error_rate=round(row["errors"] / row["completed"], 4),
+                completions_per_minute=round(row["completed"] / minutes, 4),
+                queue_wait_ms=LatencyPercentiles(
+                    p50=row["wait_p50"], p95=row["wait_p95"], p99=row["wait_p99"]
+                ),
+                execution_ms=LatencyPercentiles(
+                    p50=row["exec_p50"], p95=row["exec_p95"], p99=row["exec_p99"]
+                ),
+            )
+            for row in rows
+        ]
+
+        return WorkflowMetricsResponse(
+            start_time=start_time,
+            end_time=end_time,
+            metrics=metrics,
+            message="Successfully computed workflow metrics",
+        )
+    except Exception as e:
+        logger.error("workflow_metrics_failed", error=str(e), exc_info=True)
+        return WorkflowMetricsResponse(
+            start_time=start_time,
+            end_time=end_time,
+            metrics=[],
+            message=f"Error: {str(e)}",
+        )
+
+
+@router.get("/stream", summary="Stream Workflow Changes")
+async def stream_workflow_changes(request, last_event_id: Optional[str] = None):
+    """
+    Stream workflow create/status-change events as Server-Sent Events.
+
+    Emits a ``workflow`` event per state change and a ``status`` event with
+    aggregate counts whenever they change. Clients resume after a disconnect
+    from the ``Last-Event-ID`` header (sent automatically by ``EventSource``)
+    or the ``last_event_id`` query parameter.
+
+    Under ASGI idle connections wait on the event loop; under WSGI each
+    connection holds a worker thread for as long as it stays open.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or last_event_id
+    feed = get_feed()
+    # Django buffers an iterator of the wrong kind in full, which would never finish
+    if isinstance(request, ASGIRequest):
+        content = feed.astream(last_event_id)
+    else:
+        content = feed.stream(last_event_id)
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@router.get("/export", summary="Export Workflow History")
+async def export_workflows(
+    request,
+    status: Optional[List[str]] = Query(None),
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    gzip: bool = False,
+):
+    """
+    Stream workflow history as newline-delimited JSON, oldest first.
+
+    Each line holds one workflow's ID, name, status, queue, app version,
+    timestamps, queue wait and execution time. Rows are read through a
+    server-side cursor and written in chunks, so memory use does not depend
+    on how many workflows match.
+
+    Args:
+        status: Only include workflows in these statuses (repeatable)
+        name: Only include workflows with this function name
+        start_time: Only include workflows created at or after this time
+        end_time: Only include workflows created before this time
+        gzip: Compress the export as a ``.ndjson.gz`` file
+    """
+    filters = dict(status=status, name=name, start_time=start_time, end_time=end_time)
+    # Django buffers an iterator of the wrong kind in full, defeating the streaming
+    if isinstance(request, ASGIRequest):
+        content = workflow_export.astream_export(compress=gzip, **filters)
+    else:
+        content = workflow_export.stream_export(compress=gzip, **filters)
+
+    filename = "workflows.ndjson.gz" if gzip else "workflows.ndjson"
+    response = StreamingHttpResponse(
+        content, content_type="application/gzip" if gzip else "application/x-ndjson"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@router.get("/queues", response=QueueStatsResponse, summary="Get Queue Stats")
+async def get_queue_stats(request):
+    """
+    Get each queue's limits, depth and whether it is currently being throttled.
+
+    ``rate_limited`` means the queue has started as many workflows within its
+    limiter period as the limiter allows; ``at_concurrency_limit`` means its
+    global concurrency cap is fully used.
+    """
+    try:
+        stats = await asyncio.to_thread(
+            workflow_queries.queue_stats,
+            {name: (queue.limiter or {}).get("period") for name, queue in QUEUES.items()},
+        )
+
+        queues = []
+        for name, queue in QUEUES.items():
+            queue_stats = stats[name]
+            limiter = queue.limiter or {}
+            queues.append(
+                QueueInfo(
+                    name=name,
+                    concurrency=queue.concurrency,
+                    worker_concurrency=queue.worker_concurrency,
+                    rate_limit=limiter.get("limit"),
+                    rate_period=limiter.get("period"),
+                    enqueued=queue_stats["enqueued"],
+                    running=queue_stats["running"],
+                    oldest_enqueued_at=workflow_queries.from_epoch_ms(
+                        queue_stats["oldest_enqueued_at"]
+                    ),
+                    started_in_period=queue_stats["started_in_period"],
+                    rate_limited=bool(limiter)
+                    and queue_stats["started_in_period"] >= limiter["limit"],
+                    at_concurrency_limit=queue.concurrency is not None
+                    and queue_stats["running"] >= queue.concurrency,
+                )
+            )
+
+        return QueueStatsResponse(
+            queues=queues, message="Successfully retrieved queue stats"
+        )
+    except Exception as e:
+        logger.error("queue_stats_failed", error=str(e), exc_info=True)
+        return QueueStatsResponse(queues=[], message=f"Error: {str(e)}")
+
+
 @router.post("/aggregate", summary="Trigger Data Aggregation")
-def trigger_aggregation(request, time_range: str = "1h"):
+@dbos_async_view
+async def trigger_aggregation(
+    request,
+    time_range: str = "1h",
+    idempotency_key: Optional[str] = None,
+):
     """
     Manually trigger a data aggregation workflow.
 
+    The workflow runs on the aggregation queue, within its concurrency and
+    rate limits, and splits its work into ``AGGREGATION_PARTITIONS``
+    partitions.
+
     Args:
         time_range: Time range for aggregation (e.g., "1h", "5m", "1d")
+        idempotency_key: Return the workflow already queued with this key
+            instead of queueing another (also read from ``Idempotency-Key``)
     """
     try:
-        workflow_handle = DBOS.start_workflow(data_aggregation_task, time_range)
+        parse_time_range(time_range)
+        key = get_idempotency_key(request, idempotency_key)
+        workflow_id = key and idempotent_workflow_id(request, "aggregate", key)
+        with SetWorkflowID(workflow_id) if workflow_id else nullcontext():
+            workflow_handle = await aggregation_queue.enqueue_async(
+                data_aggregation_task, time_range
+            )
         workflow_id = workflow_handle.get_workflow_id()
 
         return {
-            "message": "Data aggregation started",
+            "message": "Data aggregation queued",
             "workflow_id": workflow_id,
             "time_range": time_range,
         }
@@ -231,18 +604,115 @@ def trigger_aggregation(request, time_range: str = "1h"):
         return {"message": "Error starting aggregation", "error": str(e)}
 
 
+@router.post("/aggregate/bulk", summary="Trigger Data Aggregations in Bulk")
+@dbos_async_view
+async def trigger_bulk_aggregation(request, time_ranges: List[str] = Query(...)):
+    """
+    Enqueue one data aggregation workflow per time range on the aggregation queue.
+
+    Args:
+        time_ranges: Time ranges to aggregate (repeatable, e.g. "1h", "5m", "1d")
+    """
+    try:
+        for time_range in time_ranges:
+            parse_time_range(time_range)
+        workflow_ids = await enqueue_bulk_async(
+            data_aggregation_task,
+            [(time_range,) for time_range in time_ranges],
+            queue=aggregation_queue,
+        )
+        return {
+            "message": "Data aggregations queued",
+            "workflow_ids": workflow_ids,
+            "time_ranges": time_ranges,
+        }
+    except Exception as e:
+        logger.error("bulk_aggregation_start_failed", error=str(e), exc_info=True)
+        return {"message": "Error queueing aggregations", "error": str(e)}
+
+
+def _step_record(step: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise a DBOS ``StepInfo`` into the fields the API reports."""
+    error = step.get("error")
+    completed_at = step.get("completed_at_epoch_ms")
+    if error is not None:
+        status = "ERROR"
+    elif completed_at:
+        status = "SUCCESS"
+    else:
+        status = "PENDING"
+    return {
+        "step_id": str(step["function_id"]),
+        "name": step["function_name"],
+        "status": status,
+        "started_at": workflow_queries.from_epoch_ms(step.get("started_at_epoch_ms")),
+        "completed_at": workflow_queries.from_epoch_ms(completed_at),
+        "output": step.get("output"),
+        "error": str(error) if error is not None else None,
+        "output_truncated": step.get("output_truncated", False),
+        "output_size": step.get("output_size"),
+    }
+
+
+def _steps_cache_kind(max_output_size: Optional[int]) -> str:
+    return "steps" if max_output_size is None else f"steps:{max_output_size}"
+
+
+async def _fetch_steps(
+    workflow_id: str, status: Optional[str], max_output_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Read a workflow's steps and cache them if the workflow has finished.
+
+    ``status`` must be read before calling, so that a terminal status
+    guarantees the step list is complete. With ``max_output_size``, outputs
+    larger than that are left out instead of being loaded.
+    """
+    if max_output_size is None:
+        raw_steps = await DBOS.list_workflow_steps_async(workflow_id)
+    else:
+        raw_steps = await asyncio.to_thread(
+            workflow_queries.list_workflow_steps,
+            workflow_id,
+            max_output_size=max_output_size,
+        )
+    steps = [_step_record(step) for step in raw_steps]
+    await workflow_cache.aset(
+        _steps_cache_kind(max_output_size), workflow_id, status, steps
+    )
+    return steps
+
+
 @router.get(
     "/workflow/{workflow_id}/details",
     response=WorkflowDetailResponse,
     summary="Get Workflow Details",
 )
-def get_workflow_details(request, workflow_id: str):
+@dbos_async_view
+async def get_workflow_details(
+    request, workflow_id: str, max_output_size: Optional[int] = None
+):
     """
     Get detailed information about a workflow including steps.
+
+    Details of finished workflows are cached, since they can no longer change.
+
+    Args:
+        max_output_size: Leave out step outputs larger than this many bytes
+            (serialised); fetch them from ``/workflow/{id}/steps/{step_id}/output``
     """
+    if max_output_size is not None:
+        max_output_size = max(0, max_output_size)
+    details_kind = (
+        "details" if max_output_size is None else f"details:{max_output_size}"
+    )
+    cached = await workflow_cache.aget(details_kind, workflow_id)
+    if cached is not None:
+        return cached
+
     try:
-        handle = DBOS.retrieve_workflow(workflow_id)
-        status = handle.get_status()
+        handle = await DBOS.retrieve_workflow_async(workflow_id)
+        status = await handle.get_status()
 
         # Get workflow result if complete
         result = None
@@ -255,7 +725,7 @@ def get_workflow_details(request, workflow_id: str):
         ]
         if is_complete:
             try:
-                result = handle.get_result()
+                result = await handle.get_result()
             except Exception as e:
                 error = str(e)
         elif status and status.status == "ERROR":
@@ -263,36 +733,34 @@ def get_workflow_details(request, workflow_id: str):
 
         # Get workflow steps
         steps = []
+        steps_loaded = False
         try:
-            step_list = DBOS.list_workflow_steps(workflow_id)
-            for step in step_list:
+            step_records = await workflow_cache.aget(
+                _steps_cache_kind(max_output_size), workflow_id
+            )
+            if step_records is None:
+                step_records = await _fetch_steps(
+                    workflow_id, status.status if status else None, max_output_size
+                )
+            for step in step_records:
                 steps.append(
                     WorkflowStepInfo(
-                        step_id=step.step_id,
-                        step_name=step.name,
-                        status=step.status,
-                        started_at=(
-                            datetime.fromtimestamp(
-                                step.created_at / 1000, tz=timezone.utc
-                            )
-                            if step.created_at
-                            else None
-                        ),
-                        completed_at=(
-                            datetime.fromtimestamp(
-                                step.updated_at / 1000, tz=timezone.utc
-                            )
-                            if step.updated_at
-                            else None
-                        ),
-                        output=step.output if hasattr(step, "output") else None,
-                        error=step.error if hasattr(step, "error") else None,
+                        step_id=step["step_id"],
+                        step_name=step["name"],
+                        status=step["status"],
+                        started_at=step["started_at"],
+                        completed_at=step["completed_at"],
+                        output=step["output"],
+                        error=step["error"],
+                        output_truncated=step.get("output_truncated", False),
+                        output_size=step.get("output_size"),
                     )
                 )
+            steps_loaded = True
         except Exception as e:
             logger.warning("workflow_steps_retrieve_failed", workflow_id=workflow_id, error=str(e))
 
-        return WorkflowDetailResponse(
+        response = WorkflowDetailResponse(
             workflow_id=workflow_id,
             name=status.name if status else "Unknown",
             status=status.status if status else "UNKNOWN",
@@ -321,6 +789,11 @@ def get_workflow_details(request, workflow_id: str):
             ),
             steps=steps,
         )
+        if steps_loaded:
+            await workflow_cache.aset(
+                details_kind, workflow_id, response.status, response
+            )
+        return response
     except Exception as e:
         logger.error("workflow_details_failed", workflow_id=workflow_id, error=str(e), exc_info=True)
         return WorkflowDetailResponse(
@@ -332,38 +805,46 @@ def get_workflow_details(request, workflow_id: str):
 
 
 @router.get("/workflow/{workflow_id}/steps", summary="Get Workflow Steps")
-def get_workflow_steps(request, workflow_id: str):
+@dbos_async_view
+async def get_workflow_steps(
+    request, workflow_id: str, max_output_size: Optional[int] = None
+):
     """
     Get the execution steps of a workflow.
+
+    Steps of finished workflows are cached, since they can no longer change.
+
+    Args:
+        max_output_size: Leave out step outputs larger than this many bytes
+            (serialised); fetch them from ``/workflow/{id}/steps/{step_id}/output``
     """
+    if max_output_size is not None:
+        max_output_size = max(0, max_output_size)
     try:
-        steps = DBOS.list_workflow_steps(workflow_id)
-        step_list = []
-
-        for step in steps:
-            step_list.append(
-                {
-                    "step_id": step.step_id,
-                    "name": step.name,
-                    "status": step.status,
-                    "created_at": (
-                        datetime.fromtimestamp(
-                            step.created_at / 1000, tz=timezone.utc
-                        ).isoformat()
-                        if step.created_at
-                        else None
-                    ),
-                    "updated_at": (
-                        datetime.fromtimestamp(
-                            step.updated_at / 1000, tz=timezone.utc
-                        ).isoformat()
-                        if step.updated_at
-                        else None
-                    ),
-                    "output": step.output if hasattr(step, "output") else None,
-                    "error": step.error if hasattr(step, "error") else None,
-                }
+        steps = await workflow_cache.aget(_steps_cache_kind(max_output_size), workflow_id)
+        if steps is None:
+            status = await DBOS.get_workflow_status_async(workflow_id)
+            steps = await _fetch_steps(
+                workflow_id, status.status if status else None, max_output_size
             )
+        step_list = [
+            {
+                "step_id": step["step_id"],
+                "name": step["name"],
+                "status": step["status"],
+                "created_at": (
+                    step["started_at"].isoformat() if step["started_at"] else None
+                ),
+                "updated_at": (
+                    step["completed_at"].isoformat() if step["completed_at"] else None
+                ),
+                "output": step["output"],
+                "error": step["error"],
+                "output_truncated": step.get("output_truncated", False),
+                "output_size": step.get("output_size"),
+            }
+            for step in steps
+        ]
 
         return {
             "workflow_id": workflow_id,
@@ -380,13 +861,67 @@ def get_workflow_steps(request, workflow_id: str):
         }
 
 
+@router.get(
+    "/workflow/{workflow_id}/steps/{step_id}/output",
+    response=WorkflowStepOutput,
+    summary="Get Workflow Step Output",
+)
+async def get_workflow_step_output(request, workflow_id: str, step_id: int):
+    """
+    Get the full output of one workflow step.
+
+    Used to load outputs left out of ``/details`` and ``/steps`` by
+    ``max_output_size``. Outputs of finished steps are cached.
+    """
+    cache_kind = f"step_output:{step_id}"
+    cached = await workflow_cache.aget(cache_kind, workflow_id)
+    if cached is not None:
+        return cached
+
+    try:
+        step = await asyncio.to_thread(
+            workflow_queries.get_step_output, workflow_id, step_id
+        )
+        if step is None:
+            return WorkflowStepOutput(
+                workflow_id=workflow_id,
+                step_id=str(step_id),
+                message=f"Step {step_id} not found",
+            )
+        record = _step_record(step)
+        response = WorkflowStepOutput(
+            workflow_id=workflow_id,
+            step_id=record["step_id"],
+            step_name=record["name"],
+            status=record["status"],
+            output=record["output"],
+            error=record["error"],
+            message="Successfully retrieved step output",
+        )
+        # A step's output never changes once it has completed
+        await workflow_cache.aset(cache_kind, workflow_id, record["status"], response)
+        return response
+    except Exception as e:
+        logger.error(
+            "workflow_step_output_failed",
+            workflow_id=workflow_id,
+            step_id=step_id,
+            error=str(e),
+            exc_info=True,
+        )
+        return WorkflowStepOutput(
+            workflow_id=workflow_id, step_id=str(step_id), message=f"Error: {str(e)}"
+        )
+
+
 @router.post("/workflow/{workflow_id}/cancel", summary="Cancel Workflow")
-def cancel_workflow(request, workflow_id: str):
+@dbos_async_view
+async def cancel_workflow(request, workflow_id: str):
     """
     Cancel a running workflow.
     """
     try:
-        DBOS.cancel_workflow(workflow_id)
+        await DBOS.cancel_workflow_async(workflow_id)
         return {
             "message": f"Workflow {workflow_id} cancelled successfully",
             "workflow_id": workflow_id,
@@ -394,7 +929,68 @@ def cancel_workflow(request, workflow_id: str):
     except Exception as e:
         logger.error("workflow_cancel_failed", workflow_id=workflow_id, error=str(e), exc_info=True)
         return {
-            "message": f"Error cancelling workflow",
+            "message": "Error cancelling workflow",
             "workflow_id": workflow_id,
             "error": str(e),
         }
+
+
+@router.post("/cancel", response=BulkCancelResponse, summary="Cancel Workflows in Bulk")
+async def bulk_cancel(request, payload: BulkCancelRequest):
+    """
+    Cancel a list of workflows, or every pending/enqueued workflow matching a filter.
+
+    Cancellation runs in the background in chunks; follow it with
+    ``GET /cancel/{job_id}``. Without an explicit ``end_time`` only workflows
+    created before this request are matched, so a runaway producer cannot
+    keep the job going forever.
+
+    Responds 400 when given neither IDs nor a filter, both at once, or more
+    than ``MAX_BULK_COUNT`` IDs.
+    """
+    filters = payload.model_dump(exclude={"workflow_ids"}, exclude_none=True)
+    if not payload.workflow_ids and not filters:
+        raise HttpError(400, "Provide workflow_ids or at least one filter")
+    if payload.workflow_ids and filters:
+        raise HttpError(400, "Provide workflow_ids or filters, not both")
+    if payload.workflow_ids and len(payload.workflow_ids) > MAX_BULK_COUNT:
+        raise HttpError(
+            400, f"At most {MAX_BULK_COUNT} workflow_ids can be cancelled at once"
+        )
+    filters.setdefault("end_time", datetime.now(timezone.utc))
+
+    try:
+        handle = await asyncio.to_thread(
+            DBOS.start_workflow,
+            bulk_cancel_workflows,
+            payload.workflow_ids or [],
+            filters,
+        )
+        return BulkCancelResponse(
+            job_id=handle.get_workflow_id(), message="Bulk cancel started"
+        )
+    except Exception as e:
+        logger.error("bulk_cancel_start_failed", error=str(e), exc_info=True)
+        return BulkCancelResponse(message=f"Error: {str(e)}")
+
+
+@router.get(
+    "/cancel/{job_id}", response=BulkCancelProgress, summary="Get Bulk Cancel Progress"
+)
+@dbos_async_view
+async def bulk_cancel_progress(request, job_id: str):
+    """
+    Get how many workflows a bulk cancel has matched and cancelled so far.
+    """
+    try:
+        status = await DBOS.get_workflow_status_async(job_id)
+        progress = await DBOS.get_event_async(job_id, PROGRESS_EVENT, timeout_seconds=0)
+        return BulkCancelProgress(
+            job_id=job_id,
+            status=status.status if status else "UNKNOWN",
+            **(progress or {}),
+            message="Successfully retrieved bulk cancel progress",
+        )
+    except Exception as e:
+        logger.error("bulk_cancel_progress_failed", job_id=job_id, error=str(e), exc_info=True)
+        return BulkCancelProgress(job_id=job_id, status="ERROR", message=f"Error: {str(e)}")
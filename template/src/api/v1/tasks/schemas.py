@@ -1,4 +1,4 @@
-from typing import Any, Optional, List, Dict
+from typing import Any, Optional, List
 from datetime import datetime
 
 from ninja import Schema
@@ -11,6 +11,18 @@ class WorkflowResult(Schema):
     started: Optional[datetime] = None
     completed: Optional[datetime] = None
     input: Optional[Any] = None  # Added for conductor detail view
+    error: Optional[str] = None
+
+
+class WorkflowResultsRequest(Schema):
+    workflow_ids: List[str]
+    only_terminal: bool = False
+
+
+class WorkflowResultsResponse(Schema):
+    results: List[WorkflowResult]
+    missing: List[str] = []
+    message: str
 
 
 class WorkflowInfo(Schema):
@@ -25,6 +37,7 @@ class WorkflowInfo(Schema):
 class WorkflowListResponse(Schema):
     workflows: List[WorkflowInfo]
     total_count: int
+    next_cursor: Optional[str] = None
     message: str
 
 
@@ -49,6 +62,19 @@ class WorkflowStepInfo(Schema):
     completed_at: Optional[datetime] = None
     output: Optional[Any] = None
     error: Optional[str] = None
+    # Set when the output was left out for exceeding the requested max_output_size
+    output_truncated: bool = False
+    output_size: Optional[int] = None
+
+
+class WorkflowStepOutput(Schema):
+    workflow_id: str
+    step_id: str
+    step_name: Optional[str] = None
+    status: Optional[str] = None
+    output: Optional[Any] = None
+    error: Optional[str] = None
+    message: str
 
 
 class WorkflowDetailResponse(Schema):
@@ -62,4 +88,69 @@ class WorkflowDetailResponse(Schema):
     output: Optional[Any] = None
     error: Optional[str] = None
     recovery_attempts: int = 0
-    steps: List[WorkflowStepInfo] = []
\ No newline at end of file
+    steps: List[WorkflowStepInfo] = []
+
+class BulkCancelRequest(Schema):
+    workflow_ids: Optional[List[str]] = None
+    status: Optional[List[str]] = None
+    name: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    workflow_id_prefix: Optional[str] = None
+
+
+class BulkCancelResponse(Schema):
+    job_id: Optional[str] = None
+    message: str
+
+
+class BulkCancelProgress(Schema):
+    job_id: str
+    status: str
+    matched: int = 0
+    cancelled: int = 0
+    chunks: int = 0
+    done: bool = False
+    message: str
+
+
+class QueueInfo(Schema):
+    name: str
+    concurrency: Optional[int] = None
+    worker_concurrency: Optional[int] = None
+    rate_limit: Optional[int] = None
+    rate_period: Optional[float] = None
+    enqueued: int = 0
+    running: int = 0
+    oldest_enqueued_at: Optional[datetime] = None
+    started_in_period: int = 0
+    rate_limited: bool = False
+    at_concurrency_limit: bool = False
+
+
+class QueueStatsResponse(Schema):
+    queues: List[QueueInfo]
+    message: str
+
+
+class LatencyPercentiles(Schema):
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class WorkflowMetrics(Schema):
+    name: str
+    completed: int
+    errors: int
+    error_rate: float
+    completions_per_minute: float
+    queue_wait_ms: LatencyPercentiles
+    execution_ms: LatencyPercentiles
+
+
+class WorkflowMetricsResponse(Schema):
+    start_time: datetime
+    end_time: datetime
+    metrics: List[WorkflowMetrics]
+    message: str
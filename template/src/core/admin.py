@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path
 
-from .models import User, StockTicker
+from .models import User, StockRollup, StockTicker
 from .views import task_monitor
 
 
@@ -33,6 +33,23 @@ class StockTickerAdmin(admin.ModelAdmin):
     search_fields = ["symbol", "company_name"]
 
 
+@admin.register(StockRollup)
+class StockRollupAdmin(admin.ModelAdmin):
+    list_display = [
+        "symbol",
+        "interval",
+        "bucket_start",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "count",
+    ]
+    list_filter = ["interval", "symbol"]
+    search_fields = ["symbol"]
+
+
 # We need to patch the admin site to add our own custom urls and app list without
 # replacing the existing admin site and third party apps registered with it.
 original_get_urls = admin.site.get_urls
@@ -0,0 +1,35 @@
+"""
+Helpers for async views that call DBOS's ``*_async`` APIs.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from django.core.handlers.asgi import ASGIRequest
+
+
+def dbos_async_view(view: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """
+    Make an async view that uses DBOS's async APIs safe to serve over WSGI.
+
+    DBOS installs its shared thread pool as the running event loop's default
+    executor. Under ASGI that loop lives as long as the server. Under WSGI
+    (``runserver``, the test client) Django runs each async view on a
+    short-lived loop and shuts its default executor down when the view returns,
+    which would leave DBOS unable to start or dequeue any more workflows. On
+    such loops, swap in a throwaway executor before the loop closes.
+    """
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                asyncio.get_running_loop().set_default_executor(
+                    ThreadPoolExecutor(max_workers=1)
+                )
+
+    return wrapper
@@ -0,0 +1,80 @@
+"""
+Cancel many workflows at once.
+
+Cancellation runs as a durable workflow that walks the matching workflows in
+chunks and publishes its progress as a DBOS event so callers can follow it.
+Each chunk is matched with one keyset query and cancelled with one
+``DBOS.cancel_workflows`` call; child workflows are not cancelled, as with
+``DBOS.cancel_workflow``.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from dbos import DBOS
+
+from core import workflow_queries
+
+logger = structlog.get_logger(__name__)
+
+# Key of the DBOS event holding a bulk cancel's progress
+PROGRESS_EVENT = "bulk_cancel_progress"
+# Workflows cancelled per UPDATE
+CANCEL_CHUNK_SIZE = 500
+
+
+@DBOS.step()
+def cancel_ids_step(workflow_ids: List[str]) -> int:
+    return workflow_queries.cancel_workflow_ids(workflow_ids)
+
+
+@DBOS.step()
+def cancel_matching_step(
+    after: Optional[Tuple[int, str]], filters: Dict[str, Any], exclude: str
+) -> Tuple[int, int, Optional[Tuple[int, str]]]:
+    return workflow_queries.cancel_next_matching(
+        limit=CANCEL_CHUNK_SIZE, after=after, exclude=exclude, **filters
+    )
+
+
+@DBOS.workflow()
+def bulk_cancel_workflows(
+    workflow_ids: Optional[List[str]], filters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Cancel the listed workflows, or else every cancellable workflow matching ``filters``.
+
+    ``filters`` takes the keyword arguments of
+    ``workflow_queries.cancel_next_matching`` (status, name, start_time,
+    end_time, workflow_id_prefix). Only PENDING and ENQUEUED workflows are
+    cancelled; this workflow never cancels itself.
+
+    Returns:
+        The final progress: workflows matched and cancelled, and chunks processed.
+    """
+    progress = {"matched": 0, "cancelled": 0, "chunks": 0, "done": False}
+
+    if workflow_ids:
+        for start in range(0, len(workflow_ids), CANCEL_CHUNK_SIZE):
+            chunk = workflow_ids[start : start + CANCEL_CHUNK_SIZE]
+            progress["matched"] += len(chunk)
+            progress["cancelled"] += cancel_ids_step(chunk)
+            progress["chunks"] += 1
+            DBOS.set_event(PROGRESS_EVENT, progress)
+    else:
+        position = None
+        while True:
+            matched, cancelled, position = cancel_matching_step(
+                position, filters, DBOS.workflow_id
+            )
+            if position is None:
+                break
+            progress["matched"] += matched
+            progress["cancelled"] += cancelled
+            progress["chunks"] += 1
+            DBOS.set_event(PROGRESS_EVENT, progress)
+
+    progress["done"] = True
+    DBOS.set_event(PROGRESS_EVENT, progress)
+    logger.info("bulk_cancel_completed", **progress)
+    return progress
@@ -1,44 +1,92 @@
 import random
-from datetime import datetime
-from typing import Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, Any, Optional, Tuple
 
 import structlog
 from dbos import DBOS
+from django.conf import settings
+
+from core.models import StockTicker
+from core.queues import aggregation_partition_queue, aggregation_queue
+from core.retention import prune_workflows
+from core.rollups import (
+    MAX_PARTITIONS,
+    complete_window,
+    fold_partition,
+    next_window,
+    refresh_stock_rollups,
+    summarize_rollups,
+)
+from core.stocks import UPSERT_FIELDS, upsert_tickers
 
 logger = structlog.get_logger(__name__)
 
 
+# Simulated universe of the stock price tracker: symbol -> (company name, base price)
+TRACKED_STOCKS = {
+    "AAPL": ("Apple Inc.", 190.0),
+    "GOOGL": ("Alphabet Inc.", 165.0),
+    "MSFT": ("Microsoft Corporation", 430.0),
+    "AMZN": ("Amazon.com Inc.", 185.0),
+    "TSLA": ("Tesla Inc.", 250.0),
+}
+
+
+@DBOS.step()
+def save_stock_prices(trading_date: date, prices: Dict[str, float]) -> int:
+    """
+    Write a price snapshot to ``StockTicker`` with one batched upsert.
+
+    Each symbol keeps one row per day, updated by every tick of that day.
+    """
+    tickers = []
+    for symbol, price in prices.items():
+        company_name, base_price = TRACKED_STOCKS[symbol]
+        change = round(price - base_price, 2)
+        tickers.append(
+            StockTicker(
+                symbol=symbol,
+                company_name=company_name,
+                price=Decimal(str(price)),
+                change=Decimal(str(change)),
+                percent_change=Decimal(str(round(change / base_price * 100, 2))),
+                volume=random.randint(1_000_000, 50_000_000),
+                date=trading_date,
+            )
+        )
+    # Keep whatever market cap is already on record
+    return upsert_tickers(
+        tickers, update_fields=[f for f in UPSERT_FIELDS if f != "market_cap"]
+    )
+
+
 @DBOS.scheduled("0 * * * * *")
 @DBOS.workflow()
 def stock_price_tracker(scheduled_time: datetime, actual_time: datetime):
     """
     Example cron job that simulates tracking stock prices.
-    Runs every minute to demonstrate DBOS scheduled workflows.
+    Runs every minute to demonstrate DBOS scheduled workflows, and stores
+    each snapshot in ``StockTicker``.
     
     Args:
         scheduled_time: The scheduled execution time
         actual_time: The actual execution time
     """
-    stocks = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA"]
     prices = {}
     
-    for symbol in stocks:
-        base_price = {
-            "AAPL": 190.0,
-            "GOOGL": 165.0,
-            "MSFT": 430.0,
-            "AMZN": 185.0,
-            "TSLA": 250.0
-        }[symbol]
-        
+    for symbol, (_, base_price) in TRACKED_STOCKS.items():
         variation = random.uniform(-5, 5)
         current_price = round(base_price + variation, 2)
         prices[symbol] = current_price
+
+    rows_upserted = save_stock_prices(scheduled_time.date(), prices)
     
     timestamp = datetime.now().isoformat()
     result = {
         "timestamp": timestamp,
         "prices": prices,
+        "rows_upserted": rows_upserted,
         "market_status": "open" if datetime.now().hour >= 9 and datetime.now().hour < 16 else "closed"
     }
     
@@ -80,41 +128,152 @@ def hourly_report(scheduled_time: datetime, actual_time: datetime):
 @DBOS.workflow()
 def daily_cleanup(scheduled_time: datetime, actual_time: datetime):
     """
-    Example daily cleanup task.
+    Daily retention job for the DBOS system database.
     Runs at midnight every day.
-    
+
+    Deletes finished workflows older than their retention period (see
+    ``WORKFLOW_RETENTION_DAYS``) in small batches, one DBOS step each.
+
     Args:
         scheduled_time: The scheduled execution time
         actual_time: The actual execution time
     """
-    cleanup_time = datetime.now()
-    
+    # Cutoffs derive from the scheduled time so a recovered run deletes the same rows
+    pruned = prune_workflows(scheduled_time)
+
     result = {
         "task": "daily_cleanup",
-        "executed_at": cleanup_time.isoformat(),
-        "items_cleaned": random.randint(10, 100),
-        "space_freed_mb": random.randint(100, 1000),
+        "executed_at": actual_time.isoformat(),
+        **pruned,
         "status": "success"
     }
-    
-    logger.info("daily_cleanup_completed", result=result)
+
+    logger.info(
+        "daily_cleanup_completed",
+        rows_deleted=pruned["rows_deleted"],
+        bytes_reclaimed=pruned["bytes_reclaimed"],
+        batches=pruned["batches"],
+    )
     return result
 
 
+# Units accepted in data_aggregation_task time ranges, e.g. "5m" or "7d"
+TIME_RANGE_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_time_range(time_range: str) -> timedelta:
+    """
+    Parse a time range such as ``"5m"``, ``"1h"`` or ``"7d"``.
+
+    Raises:
+        ValueError: If the time range is malformed.
+    """
+    amount, unit = time_range[:-1], time_range[-1:]
+    if not amount.isdigit() or unit not in TIME_RANGE_UNITS:
+        raise ValueError(f"Invalid time range: {time_range!r}")
+    return timedelta(**{TIME_RANGE_UNITS[unit]: int(amount)})
+
+
+@DBOS.step()
+def refresh_rollups_step() -> Dict[str, Any]:
+    return refresh_stock_rollups()
+
+
+@DBOS.step()
+def next_rollup_window_step() -> Optional[Tuple[datetime, datetime]]:
+    return next_window()
+
+
+@DBOS.step(retries_allowed=True, max_attempts=3)
+def fold_partition_step(
+    lower: datetime, upper: datetime, partition: int, partitions: int
+) -> Dict[str, int]:
+    # Folding is one transaction, so a retried attempt never double counts
+    return fold_partition(lower, upper, partition, partitions)
+
+
+@DBOS.step()
+def complete_rollup_window_step(upper: datetime) -> None:
+    complete_window(upper)
+
+
+@DBOS.workflow()
+def aggregate_partition(
+    lower: datetime, upper: datetime, partition: int, partitions: int
+) -> Dict[str, int]:
+    """
+    Fold the ticks of one symbol-hash partition of a claimed window into the rollups.
+    Enqueued by ``data_aggregation_task`` when it fans out.
+    """
+    result = fold_partition_step(lower, upper, partition, partitions)
+    return {"partition": partition, **result}
+
+
+def _fan_out_rollups(partitions: int) -> Dict[str, Any]:
+    # Fold disjoint symbol partitions of the window in parallel
+    window = next_rollup_window_step()
+    if window is None:
+        return {"ticks": 0, "buckets": 0, "partitions": []}
+
+    handles = [
+        aggregation_partition_queue.enqueue(
+            aggregate_partition, *window, partition, partitions
+        )
+        for partition in range(partitions)
+    ]
+    # A partition that failed raises here and the high-water mark stays put:
+    # the next refresh folds its ticks, while the others skip what they did
+    results = [handle.get_result() for handle in handles]
+    complete_rollup_window_step(window[1])
+    return {
+        "ticks": sum(result["ticks"] for result in results),
+        "buckets": sum(result["buckets"] for result in results),
+        "partitions": results,
+    }
+
+
+@DBOS.step()
+def summarize_rollups_step(since: datetime) -> Dict[str, Any]:
+    return summarize_rollups(since)
+
+
 @DBOS.workflow()
 def data_aggregation_task(time_range: str = "1h") -> Dict[str, Any]:
     """
-    Example task that can be called manually or scheduled.
-    Aggregates data for a specified time range.
+    Refresh the StockTicker OHLC rollups, then summarise the last ``time_range``.
+    Can be called manually or scheduled.
+
+    Only ticker rows written since the previous refresh are read; see
+    ``core.rollups``. With ``settings.AGGREGATION_PARTITIONS`` above one,
+    symbols are split by hash and each partition is folded by a child
+    workflow on the "aggregation_partitions" queue, so the work spreads
+    across worker threads and processes. The count is a deployment setting,
+    not a per-run choice, so every run folds the same partitions.
     """
-    start_time = datetime.now()
-    
+    start_time = datetime.now(timezone.utc)
+    window = parse_time_range(time_range)
+    partitions = settings.AGGREGATION_PARTITIONS
+    if not 1 <= partitions <= MAX_PARTITIONS:
+        raise ValueError(
+            f"AGGREGATION_PARTITIONS must be between 1 and {MAX_PARTITIONS}"
+        )
+
+    if partitions > 1:
+        refreshed = _fan_out_rollups(partitions)
+    else:
+        refreshed = refresh_rollups_step()
+    summary = summarize_rollups_step(start_time - window)
+
     aggregation = {
         "time_range": time_range,
         "start_time": start_time.isoformat(),
-        "data_points": random.randint(100, 1000),
-        "aggregated_value": round(random.uniform(1000, 10000), 2),
-        "processing_time_ms": random.randint(10, 100)
+        "ticks_processed": refreshed["ticks"],
+        "buckets_updated": refreshed["buckets"],
+        "partitions": refreshed.get("partitions", []),
+        **summary,
+        "processing_time_ms": int(
+            (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
+        ),
     }
     
     logger.info("data_aggregation_completed", time_range=time_range, aggregation=aggregation)
@@ -131,4 +290,5 @@ def five_minute_aggregation(scheduled_time: datetime, actual_time: datetime):
         scheduled_time: The scheduled execution time
         actual_time: The actual execution time
     """
-    return data_aggregation_task("5m")
+    # Run on the aggregation queue so scheduled and manual runs share its limits
+    return aggregation_queue.enqueue(data_aggregation_task, "5m").get_result()
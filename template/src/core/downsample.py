@@ -0,0 +1,101 @@
+"""
+Downsampling of time series for charts.
+
+Implements Largest-Triangle-Three-Buckets (Steinarsson, 2013): the series is
+split into equal-count buckets and from each the point forming the largest
+triangle with the previously kept point and the next bucket's average is
+kept. Peaks and troughs survive, unlike plain averaging or striding, so a
+chart of a few hundred points looks like the full series.
+
+With ``numpy`` installed (the ``charts`` extra), wide buckets are scanned
+with array operations; otherwise, or when buckets hold only a few points, a
+plain Python loop picks the same points.
+"""
+
+from typing import List, Sequence
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+# Buckets narrower than this are scanned faster in Python than sliced in numpy
+MIN_VECTOR_BUCKET = 20
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Pick ``threshold`` points of the series ``(xs, ys)`` with LTTB.
+
+    ``xs`` must be sorted. The first and last points are always kept.
+
+    Returns:
+        Indexes of the kept points, ascending; every index if the series has
+        no more than ``threshold`` points.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    # Buckets between the fixed first and last points
+    every = (n - 2) / (threshold - 2)
+    if numpy is not None and every >= MIN_VECTOR_BUCKET:
+        return _lttb_numpy(xs, ys, threshold, every)
+    return _lttb_python(xs, ys, threshold, every)
+
+
+def _lttb_python(
+    xs: Sequence[float], ys: Sequence[float], threshold: int, every: float
+) -> List[int]:
+    n = len(xs)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+
+        next_xs = xs[end:next_end]
+        next_ys = ys[end:next_end]
+        avg_x = sum(next_xs) / len(next_xs)
+        avg_y = sum(next_ys) / len(next_ys)
+
+        ax, ay = xs[a], ys[a]
+        dx, dy = avg_x - ax, avg_y - ay
+        # Twice the triangle's area; the constant factor does not change the pick
+        a = max(
+            range(start, end),
+            key=lambda j: abs(dx * (ys[j] - ay) - (xs[j] - ax) * dy),
+        )
+        selected.append(a)
+
+    selected.append(n - 1)
+    return selected
+
+
+def _lttb_numpy(
+    xs: Sequence[float], ys: Sequence[float], threshold: int, every: float
+) -> List[int]:
+    n = len(xs)
+    x = numpy.asarray(xs, dtype=float)
+    y = numpy.asarray(ys, dtype=float)
+    bounds = [int(i * every) + 1 for i in range(threshold - 1)]
+    # Averages of every bucket after the first, the last one ending at n
+    starts = numpy.array(bounds[1:])
+    counts = numpy.diff(starts, append=n)
+    avg_xs = (numpy.add.reduceat(x, starts) / counts).tolist()
+    avg_ys = (numpy.add.reduceat(y, starts) / counts).tolist()
+
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        ax, ay = xs[a], ys[a]
+        dx, dy = avg_xs[i] - ax, avg_ys[i] - ay
+        # The same doubled area as the loop, for the whole bucket at once
+        areas = numpy.abs(dx * (y[start:end] - ay) - (x[start:end] - ax) * dy)
+        a = start + int(areas.argmax())
+        selected.append(a)
+
+    selected.append(n - 1)
+    return selected
@@ -0,0 +1,42 @@
+"""
+Idempotent workflow submission.
+
+A client-supplied idempotency key is hashed, together with the endpoint and
+the caller, into a deterministic DBOS workflow ID. DBOS never starts two
+workflows with the same ID: resubmitting returns the existing workflow after
+a single primary-key lookup, so a retried request cannot repeat the work.
+"""
+
+import hashlib
+from typing import Optional
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def get_idempotency_key(request, key: Optional[str] = None) -> Optional[str]:
+    """
+    Return the request's idempotency key: the ``Idempotency-Key`` header, else ``key``.
+
+    Raises:
+        ValueError: If the key is longer than ``MAX_KEY_LENGTH`` characters.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER) or key
+    if key and len(key) > MAX_KEY_LENGTH:
+        raise ValueError(
+            f"Idempotency key must be at most {MAX_KEY_LENGTH} characters"
+        )
+    return key or None
+
+
+def idempotent_workflow_id(request, scope: str, key: str) -> str:
+    """
+    Derive the workflow ID for ``key`` submitted to ``scope`` by the request's caller.
+
+    Keys are namespaced per authenticated user (or the shared API key), so
+    different callers can never collide on the same key.
+    """
+    caller = getattr(getattr(request, "auth", None), "pk", None)
+    owner = f"user:{caller}" if caller is not None else "api-key"
+    digest = hashlib.sha256(f"{scope}\n{owner}\n{key}".encode()).hexdigest()[:32]
+    return f"{scope}-{digest}"
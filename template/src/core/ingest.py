@@ -0,0 +1,249 @@
+"""
+Bulk loading of historical ticker data into ``StockTicker``.
+
+Uploads are CSV (with a header row) or NDJSON, one ticker per row or line,
+with the fields of ``INGEST_FIELDS``; ``market_cap`` is optional. Rows are
+read as a stream, so memory stays bounded however large the upload:
+
+- On PostgreSQL, batches are ``COPY``-ed into a temporary staging table and
+  merged into ``stock_ticker`` with one set-based ``INSERT ... ON CONFLICT``.
+  The database parses and checks every value.
+- Elsewhere (SQLite), values are checked here and upserted in batches with
+  ``executemany``.
+
+Either way the load is one transaction: a bad row aborts it entirely. A
+(symbol, date) already stored is updated, and within an upload the last row
+for a (symbol, date) wins. A missing ``market_cap`` keeps the stored one.
+The rollup high-water mark is held for the duration (see
+``core.rollups.lock_rollups``), so however long a load runs, its rows are
+folded by the next refresh rather than left behind the mark.
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, IO, Iterable, Iterator, List, Tuple
+
+import orjson
+import structlog
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import StockTicker
+from core.response_cache import bump_table_version
+from core.rollups import lock_rollups
+
+logger = structlog.get_logger(__name__)
+
+INGEST_FIELDS = (
+    "symbol",
+    "company_name",
+    "price",
+    "change",
+    "percent_change",
+    "volume",
+    "market_cap",
+    "date",
+)
+OPTIONAL_FIELDS = {"market_cap"}
+# Overwritten when the (symbol, date) exists; market_cap only when given
+UPDATE_FIELDS = ("company_name", "price", "change", "percent_change", "volume")
+FORMATS = ("csv", "ndjson")
+# Rows per COPY into the staging table
+COPY_BATCH_SIZE = 50_000
+# Rows per executemany on databases without COPY
+INSERT_BATCH_SIZE = 2_000
+
+
+def detect_format(filename: str = "", content_type: str = "") -> str:
+    """Guess the upload format from a file name or content type; CSV by default."""
+    if filename.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+def read_records(stream: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of a CSV or NDJSON byte stream as dicts, one at a time.
+
+    Raises:
+        ValueError: If ``fmt`` is unknown or a line is not a JSON object.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of {FORMATS}")
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+    for line_number, line in enumerate(text, start=1):
+        if line.strip():
+            try:
+                record = orjson.loads(line)
+            except orjson.JSONDecodeError as e:
+                raise ValueError(f"Line {line_number}: invalid JSON: {e}") from e
+            if not isinstance(record, dict):
+                raise ValueError(f"Line {line_number}: expected a JSON object")
+            yield record
+
+
+def _fields(record: Dict[str, Any], row_number: int) -> List[Any]:
+    values = []
+    for field in INGEST_FIELDS:
+        value = record.get(field)
+        if value in (None, ""):
+            if field not in OPTIONAL_FIELDS:
+                raise ValueError(f"Row {row_number}: missing {field}")
+            value = None
+        elif field == "symbol":
+            value = str(value).strip().upper()
+        values.append(value)
+    return values
+
+
+def _conflict_clause(table: str) -> str:
+    updates = [
+        f"{name} = EXCLUDED.{name}"
+        for name in map(connection.ops.quote_name, UPDATE_FIELDS)
+    ]
+    return (
+        f"ON CONFLICT (symbol, date) DO UPDATE SET {', '.join(updates)}, "
+        f"market_cap = COALESCE(EXCLUDED.market_cap, {table}.market_cap), "
+        "updated_at = EXCLUDED.updated_at"
+    )
+
+
+def _copy_batch(cursor, table: str, rows: List[List[Any]]) -> None:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    sql = (
+        f"COPY {table} (line, {', '.join(INGEST_FIELDS)}) "
+        "FROM STDIN WITH (FORMAT csv)"
+    )
+    raw = cursor.cursor
+    # The driver cursor bypasses Django's wrapping: without it a bad value
+    # raises the driver's DataError rather than django.db.DataError
+    with connection.wrap_database_errors:
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            buffer.seek(0)
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def _load_postgresql(records: Iterable[Dict[str, Any]]) -> int:
+    table = StockTicker._meta.db_table
+    staging = f"{table}_staging"
+    columns = ", ".join(connection.ops.quote_name(field) for field in INGEST_FIELDS)
+
+    loaded = 0
+    with connection.cursor() as cursor:
+        # Qualified so only a staging table left by an earlier load in the same
+        # transaction can match, never a permanent table of that name
+        cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{staging}")
+        cursor.execute(
+            f"""
+            CREATE TEMPORARY TABLE {staging} (
+                line bigint NOT NULL,
+                symbol varchar(10) NOT NULL,
+                company_name varchar(100) NOT NULL,
+                price numeric(10, 2) NOT NULL,
+                change numeric(10, 2) NOT NULL,
+                percent_change numeric(5, 2) NOT NULL,
+                volume bigint NOT NULL,
+                market_cap bigint,
+                date date NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+        batch: List[List[Any]] = []
+        for loaded, record in enumerate(records, start=1):
+            batch.append([loaded, *_fields(record, loaded)])
+            if len(batch) >= COPY_BATCH_SIZE:
+                _copy_batch(cursor, staging, batch)
+                batch = []
+        if batch:
+            _copy_batch(cursor, staging, batch)
+
+        # DISTINCT ON keeps the last row per key; ON CONFLICT cannot touch a row twice
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({columns}, created_at, updated_at)
+            SELECT DISTINCT ON (symbol, date) {columns}, now(), now()
+            FROM {staging}
+            ORDER BY symbol, date, line DESC
+            {_conflict_clause(table)}
+            """
+        )
+    return loaded
+
+
+def _typed(ops, values: List[Any], row_number: int) -> Tuple[Any, ...]:
+    symbol, company_name, price, change, percent_change, volume, market_cap, day = values
+    try:
+        if len(symbol) > 10 or len(str(company_name)) > 100:
+            raise ValueError("symbol or company_name too long")
+        return (
+            symbol,
+            str(company_name),
+            ops.adapt_decimalfield_value(Decimal(str(price)), 10, 2),
+            ops.adapt_decimalfield_value(Decimal(str(change)), 10, 2),
+            ops.adapt_decimalfield_value(Decimal(str(percent_change)), 5, 2),
+            int(volume),
+            None if market_cap is None else int(market_cap),
+            ops.adapt_datefield_value(date.fromisoformat(str(day))),
+        )
+    except (ValueError, TypeError, InvalidOperation) as e:
+        raise ValueError(f"Row {row_number}: {e}") from e
+
+
+def _load_batched(records: Iterable[Dict[str, Any]]) -> int:
+    table = StockTicker._meta.db_table
+    columns = ", ".join(connection.ops.quote_name(field) for field in INGEST_FIELDS)
+    sql = f"""
+        INSERT INTO {table} ({columns}, created_at, updated_at)
+        VALUES ({", ".join(["%s"] * (len(INGEST_FIELDS) + 2))})
+        {_conflict_clause(table)}
+    """
+    # Looked up once: connection attributes go through a thread-local per access
+    ops = connection.ops
+    now = ops.adapt_datetimefield_value(timezone.now())
+
+    loaded = 0
+    with connection.cursor() as cursor:
+        batch: List[Tuple[Any, ...]] = []
+        for loaded, record in enumerate(records, start=1):
+            batch.append((*_typed(ops, _fields(record, loaded), loaded), now, now))
+            if len(batch) >= INSERT_BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+    return loaded
+
+
+def ingest_tickers(stream: IO[bytes], fmt: str = "csv") -> int:
+    """
+    Upsert every ticker in a CSV or NDJSON byte stream into ``StockTicker``.
+
+    Returns:
+        The number of rows read.
+
+    Raises:
+        ValueError: If a row is malformed (the load is rolled back).
+        django.db.DataError: If PostgreSQL rejects a value during ``COPY``
+            (the load is rolled back); on other databases such rows raise
+            ``ValueError``.
+    """
+    records = read_records(stream, fmt)
+    with transaction.atomic():
+        lock_rollups()
+        if connection.vendor == "postgresql":
+            loaded = _load_postgresql(records)
+        else:
+            loaded = _load_batched(records)
+        if loaded:
+            bump_table_version(StockTicker)
+    logger.info("stock_tickers_ingested", rows=loaded, format=fmt)
+    return loaded
@@ -0,0 +1,129 @@
+"""
+Compare Ninja's default response serialization with the orjson and schema fast paths.
+
+Payloads mirror /api/v1/tasks/list and /api/v1/example/stocks pages and are
+built in memory, so no database or DBOS is needed:
+
+    python manage.py benchmark_serialization --rows 1000
+"""
+
+import json
+import timeit
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+from django.core.management.base import BaseCommand
+from ninja.responses import NinjaJSONEncoder
+from pydantic import TypeAdapter
+
+from api.v1.example.schemas import StockTickerOut
+from api.v1.tasks.schemas import WorkflowInfo, WorkflowListResponse
+from core.renderers import renderer
+
+
+def _workflow_page(rows: int) -> WorkflowListResponse:
+    now = datetime.now(timezone.utc)
+    workflows = [
+        WorkflowInfo(
+            workflow_id=f"workflow-{i:08d}",
+            name="stock_price_tracker",
+            status="SUCCESS",
+            created_at=now - timedelta(seconds=i),
+            updated_at=now - timedelta(seconds=i - 1),
+            app_version="v1",
+        )
+        for i in range(rows)
+    ]
+    return WorkflowListResponse(
+        workflows=workflows, total_count=rows, message="Successfully retrieved workflows"
+    )
+
+
+def _stock_page(rows: int) -> List[dict]:
+    # As get_stocks builds them from values_list tuples
+    return [
+        {
+            "symbol": f"S{i % 500:03d}",
+            "company_name": f"Company {i % 500}",
+            "price": Decimal("123.45"),
+            "change": Decimal("-1.20"),
+            "percent_change": Decimal("-0.96"),
+            "volume": 1_000_000 + i,
+            "date": date(2025, 1, 1) - timedelta(days=i // 500),
+        }
+        for i in range(rows)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark JSON serialization of /tasks/list and /example/stocks payloads"
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per payload")
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timing runs; the best is reported"
+        )
+
+    def handle(self, *args, rows, repeat, **options):
+        workflow_page = _workflow_page(rows)
+        workflow_adapter = TypeAdapter(WorkflowListResponse)
+        stock_page = _stock_page(rows)
+        stock_adapter = TypeAdapter(List[StockTickerOut])
+
+        def stdlib(data):
+            return json.dumps(data, cls=NinjaJSONEncoder)
+
+        def orjson(data):
+            return renderer.render(None, data, response_status=200)
+
+        cases = [
+            (
+                "/tasks/list",
+                "re-validate + json",
+                lambda: stdlib(
+                    workflow_adapter.dump_python(
+                        workflow_adapter.validate_python(
+                            workflow_page.model_dump(), from_attributes=True
+                        )
+                    )
+                ),
+            ),
+            (
+                "/tasks/list",
+                "model_dump + json",
+                lambda: stdlib(workflow_page.model_dump()),
+            ),
+            (
+                "/tasks/list",
+                "model_dump + orjson",
+                lambda: orjson(workflow_page.model_dump()),
+            ),
+            ("/tasks/list", "model_dump_json", workflow_page.model_dump_json),
+            (
+                "/example/stocks",
+                "validate + json",
+                lambda: stdlib(
+                    stock_adapter.dump_python(stock_adapter.validate_python(stock_page))
+                ),
+            ),
+            (
+                "/example/stocks",
+                "validate + orjson",
+                lambda: orjson(
+                    stock_adapter.dump_python(stock_adapter.validate_python(stock_page))
+                ),
+            ),
+        ]
+
+        self.stdout.write(f"{rows} rows, best of {repeat}\n")
+        baseline = {}
+        for payload, method, func in cases:
+            number = max(1, 10_000 // rows)
+            best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+            baseline.setdefault(payload, best)
+            self.stdout.write(
+                f"{payload:<16} {method:<22} {best * 1000:8.2f} ms"
+                f"  {baseline[payload] / best:5.1f}x"
+            )
@@ -0,0 +1,42 @@
+"""
+Bulk load historical stock data into StockTicker from CSV or NDJSON files:
+
+    python manage.py ingest_stocks history.csv
+    zcat history.ndjson.gz | python manage.py ingest_stocks - --format ndjson
+"""
+
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DataError
+
+from core.ingest import FORMATS, detect_format, ingest_tickers
+
+
+class Command(BaseCommand):
+    help = "Upsert stock tickers from CSV or NDJSON files (COPY on PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("paths", nargs="+", help="Files to load, or - for stdin")
+        parser.add_argument(
+            "--format", choices=FORMATS, help="Default: guessed from the file name"
+        )
+
+    def handle(self, *args, paths, format, **options):
+        for path in paths:
+            fmt = format or detect_format(path)
+            started = time.monotonic()
+            try:
+                if path == "-":
+                    rows = ingest_tickers(sys.stdin.buffer, fmt)
+                else:
+                    with open(path, "rb") as stream:
+                        rows = ingest_tickers(stream, fmt)
+            except (OSError, ValueError, DataError) as e:
+                raise CommandError(f"{path}: {e}")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{path}: loaded {rows} rows in {time.monotonic() - started:.1f}s"
+                )
+            )
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+def remove_duplicate_tickers(apps, schema_editor):
+    StockTicker = apps.get_model("core", "StockTicker")
+
+    # Keep the most recently written row of each (symbol, date)
+    latest_ids = (
+        StockTicker.objects.values("symbol", "date")
+        .annotate(latest_id=models.Max("id"))
+        .values("latest_id")
+    )
+    StockTicker.objects.exclude(id__in=latest_ids).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_populate_stock_data"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_tickers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="stockticker",
+            constraint=models.UniqueConstraint(
+                fields=("symbol", "date"), name="stock_ticker_symbol_date_uniq"
+            ),
+        ),
+    ]
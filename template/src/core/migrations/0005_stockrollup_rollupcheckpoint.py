@@ -0,0 +1,79 @@
+# Generated by Django 6.1.2 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_stockticker_symbol_date_uniq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RollupCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("position", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "rollup_checkpoint",
+            },
+        ),
+        migrations.CreateModel(
+            name="StockRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("symbol", models.CharField(max_length=10)),
+                (
+                    "interval",
+                    models.CharField(
+                        choices=[("5m", "Five Minutes"), ("1h", "Hour"), ("1d", "Day")],
+                        max_length=2,
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("open", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("high", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("low", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("close", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("volume", models.BigIntegerField()),
+                ("count", models.IntegerField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "stock_rollup",
+                "ordering": ["symbol", "interval", "bucket_start"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("symbol", "interval", "bucket_start"),
+                        name="stock_rollup_bucket_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="stockticker",
+            index=models.Index(
+                fields=["updated_at", "symbol"], name="stock_ticker_updated_idx"
+            ),
+        ),
+    ]
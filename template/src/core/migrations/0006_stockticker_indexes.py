@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_stockrollup_rollupcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="stockticker",
+            index=models.Index(
+                fields=["-date", "symbol"], name="stock_ticker_date_symbol_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-18 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_stockticker_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="stockticker",
+            index=models.Index(
+                fields=["symbol", "-date"], name="stock_ticker_symbol_latest_idx"
+            ),
+        ),
+    ]
@@ -22,6 +22,25 @@ class StockTicker(models.Model):
     class Meta:
         db_table = "stock_ticker"
         ordering = ["-date", "symbol"]
+        constraints = [
+            # One row per symbol per day; the conflict target of upsert_tickers
+            models.UniqueConstraint(
+                fields=["symbol", "date"], name="stock_ticker_symbol_date_uniq"
+            ),
+        ]
+        indexes = [
+            # Matches the default ordering, so unfiltered pages are index range scans.
+            # Per-symbol pages use the (symbol, date) unique index instead.
+            models.Index(fields=["-date", "symbol"], name="stock_ticker_date_symbol_idx"),
+            # Newest row of each symbol first, for latest_tickers' DISTINCT ON
+            models.Index(
+                fields=["symbol", "-date"], name="stock_ticker_symbol_latest_idx"
+            ),
+            # High-water-mark scans of core.rollups
+            models.Index(
+                fields=["updated_at", "symbol"], name="stock_ticker_updated_idx"
+            ),
+        ]
 
     symbol = models.CharField(max_length=10)
     company_name = models.CharField(max_length=100)
@@ -36,3 +55,56 @@ class StockTicker(models.Model):
 
     def __str__(self):
         return f"{self.symbol} - {self.date} - ${self.price}"
+
+
+class StockRollup(models.Model):
+    """
+    Open/high/low/close, volume and tick count of a symbol over one time bucket.
+
+    Maintained incrementally from ``StockTicker`` by ``core.rollups``, which
+    describes how ticks are bucketed and what ``volume`` and ``count`` mean.
+    """
+
+    class Interval(models.TextChoices):
+        FIVE_MINUTES = "5m"
+        HOUR = "1h"
+        DAY = "1d"
+
+    class Meta:
+        db_table = "stock_rollup"
+        ordering = ["symbol", "interval", "bucket_start"]
+        constraints = [
+            # Also serves range queries by symbol, interval and time
+            models.UniqueConstraint(
+                fields=["symbol", "interval", "bucket_start"],
+                name="stock_rollup_bucket_uniq",
+            ),
+        ]
+
+    symbol = models.CharField(max_length=10)
+    interval = models.CharField(max_length=2, choices=Interval.choices)
+    bucket_start = models.DateTimeField()
+    open = models.DecimalField(max_digits=10, decimal_places=2)
+    high = models.DecimalField(max_digits=10, decimal_places=2)
+    low = models.DecimalField(max_digits=10, decimal_places=2)
+    close = models.DecimalField(max_digits=10, decimal_places=2)
+    volume = models.BigIntegerField()
+    count = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.symbol} - {self.interval} - {self.bucket_start}"
+
+
+class RollupCheckpoint(models.Model):
+    """High-water mark of the source rows a rollup has already consumed."""
+
+    class Meta:
+        db_table = "rollup_checkpoint"
+
+    name = models.CharField(max_length=100, unique=True)
+    position = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.position}"
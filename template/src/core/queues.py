@@ -0,0 +1,101 @@
+"""
+DBOS queues used to run workflows off the request path.
+
+Queues are declared from ``settings.DBOS_QUEUES`` so their concurrency can be
+tuned per deployment. Workflows enqueued on a queue are dequeued by whichever
+DBOS process has capacity, within the queue's limits.
+"""
+
+import asyncio
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import structlog
+from dbos import DBOS, Queue, SetWorkflowID
+from django.conf import settings
+
+logger = structlog.get_logger(__name__)
+
+
+def _declare_queue(name: str) -> Queue:
+    options = settings.DBOS_QUEUES.get(name, {})
+    return Queue(
+        name,
+        concurrency=options.get("concurrency"),
+        limiter=options.get("limiter"),
+        worker_concurrency=options.get("worker_concurrency"),
+    )
+
+
+QUEUES: Dict[str, Queue] = {name: _declare_queue(name) for name in settings.DBOS_QUEUES}
+
+bulk_queue = QUEUES["bulk"]
+aggregation_queue = QUEUES["aggregation"]
+aggregation_partition_queue = QUEUES["aggregation_partitions"]
+
+
+@DBOS.workflow()
+def enqueue_batch(
+    queue_name: str,
+    func: Callable[..., Any],
+    workflow_ids: List[str],
+    args_list: List[Sequence[Any]],
+) -> int:
+    """
+    Enqueue one workflow per ID onto a queue.
+
+    Runs as a workflow so that, once it has started, every child is enqueued
+    exactly once even if the process dies partway through.
+    """
+    queue = QUEUES[queue_name]
+    for workflow_id, args in zip(workflow_ids, args_list):
+        with SetWorkflowID(workflow_id):
+            queue.enqueue(func, *args)
+    logger.info("batch_enqueued", queue=queue_name, count=len(workflow_ids))
+    return len(workflow_ids)
+
+
+def _batch_workflow_id(workflow_ids: List[str]) -> str:
+    # Derived from the first child, so resubmitting the same IDs reuses the batch
+    return f"{workflow_ids[0]}-batch"
+
+
+async def enqueue_bulk_async(
+    func: Callable[..., Any],
+    args_list: List[Sequence[Any]],
+    queue: Optional[Queue] = None,
+    workflow_ids: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    Submit ``func`` once per entry of ``args_list`` and return the workflow IDs.
+
+    DBOS has no multi-row enqueue, so the IDs are generated up front and a
+    single ``enqueue_batch`` workflow is started to enqueue them. The caller
+    pays for one database write regardless of batch size; execution is then
+    bounded by the queue's concurrency limits rather than by how many
+    requests arrive at once.
+
+    Pass ``workflow_ids`` to choose the IDs, e.g. to make a submission
+    idempotent: IDs that already exist are not enqueued again.
+
+    Enqueueing never runs the workflow on the caller's event loop, so it is
+    safe under both ASGI and WSGI (where each async view gets a short-lived
+    loop). Batches are handed to ``enqueue_batch`` from a worker thread.
+    """
+    queue = queue or bulk_queue
+    workflow_ids = workflow_ids or [str(uuid.uuid4()) for _ in args_list]
+    if len(workflow_ids) == 1:
+        with SetWorkflowID(workflow_ids[0]):
+            await queue.enqueue_async(func, *args_list[0])
+    elif workflow_ids:
+        # to_thread copies the context, which carries the workflow ID to the thread
+        with SetWorkflowID(_batch_workflow_id(workflow_ids)):
+            await asyncio.to_thread(
+                DBOS.start_workflow,
+                enqueue_batch,
+                queue.name,
+                func,
+                workflow_ids,
+                [list(a) for a in args_list],
+            )
+    return workflow_ids
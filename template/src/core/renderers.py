@@ -0,0 +1,86 @@
+"""
+orjson-based JSON rendering and parsing for the Ninja API.
+
+``ORJSONRenderer`` and ``ORJSONParser`` replace Ninja's stdlib ``json``
+defaults. Types orjson does not serialize natively (Decimal, lazy
+translations, ...) fall back to Ninja's encoder, so the JSON is the same
+apart from datetimes keeping their microseconds.
+
+``render_schema_results`` is an opt-in fast path for views that build their
+response schema objects themselves, such as ``/tasks/list``: such a result is
+serialized by pydantic in one pass instead of being dumped to Python objects
+and encoded again, and is never validated a second time. Apply it only where
+the serialization cost has been measured; everywhere else Ninja keeps
+validating responses against their declared schema.
+"""
+
+import asyncio
+import functools
+from typing import Any
+
+import orjson
+from django.http import HttpResponse
+from ninja import Schema
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+_fallback = NinjaJSONEncoder()
+
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request, data: Any, *, response_status: int) -> bytes:
+        return orjson.dumps(data, default=_fallback.default, option=JSON_OPTIONS)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request):
+        return orjson.loads(request.body)
+
+
+renderer = ORJSONRenderer()
+
+
+def _schema_response(result: Schema, kwargs) -> HttpResponse:
+    # Fill ninja's temporal response if the view takes it, keeping its headers
+    response = next(
+        (value for value in kwargs.values() if isinstance(value, HttpResponse)),
+        None,
+    )
+    response = response if response is not None else HttpResponse()
+    response.content = result.model_dump_json()
+    response["Content-Type"] = f"{renderer.media_type}; charset={renderer.charset}"
+    return response
+
+
+def render_schema_results(view_func):
+    """
+    Serialize ``Schema`` instances returned by ``view_func`` directly.
+
+    Apply it below the route decorator of a view. Any other result,
+    including ``(status, body)`` pairs, is left to Ninja. The view must
+    return its declared response schema, since it is not checked again.
+    """
+    if asyncio.iscoroutinefunction(view_func):
+
+        @functools.wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            result = await view_func(request, *args, **kwargs)
+            if isinstance(result, Schema):
+                return _schema_response(result, kwargs)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        result = view_func(request, *args, **kwargs)
+        if isinstance(result, Schema):
+            return _schema_response(result, kwargs)
+        return result
+
+    return wrapper
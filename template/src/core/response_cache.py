@@ -0,0 +1,185 @@
+"""
+Conditional GET and response caching for read-only API endpoints.
+
+Every table a cached endpoint reads has a version counter in the ``valkey``
+cache, bumped whenever the table is written. A response's ETag is derived
+from the request's path and query and the versions of the tables it reads,
+so an ``If-None-Match`` request is answered with ``304 Not Modified`` without
+querying the database, and the serialized body of every other request is
+reused until one of its tables changes.
+
+Writes that bypass ``bump_table_version`` and the model signals, such as
+``QuerySet.update()``, are picked up once cached bodies expire after
+``API_RESPONSE_CACHE_TIMEOUT`` seconds.
+"""
+
+import functools
+import hashlib
+import time
+from typing import Any, Dict, Optional, Type
+
+import structlog
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Model
+from django.http import HttpResponse, HttpResponseNotModified
+from django.http.response import HttpResponseBase
+from django.utils.http import parse_etags
+from pydantic import TypeAdapter
+
+from core.renderers import renderer
+
+logger = structlog.get_logger(__name__)
+
+CACHE_ALIAS = "valkey"
+# Clients keep the body but revalidate it with If-None-Match on every fetch
+CACHE_CONTROL = "private, no-cache"
+
+
+def _version_key(model: Type[Model]) -> str:
+    return f"table_version:{model._meta.db_table}"
+
+
+def table_version(*models: Type[Model]) -> Optional[str]:
+    """
+    Return the combined version of the tables of ``models``.
+
+    Returns:
+        The version, or ``None`` if the cache is unavailable.
+    """
+    cache = caches[CACHE_ALIAS]
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock rather than 0, so an evicted counter never
+            # reissues a version that is still cached
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    if any(versions[key] is None for key in keys):
+        return None
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def bump_table_version(*models: Type[Model]) -> None:
+    """
+    Invalidate every cached response that reads the tables of ``models``.
+
+    Inside a transaction the bump waits for the commit, so a response rendered
+    from the old rows in the meantime is never cached under the new version.
+    """
+    transaction.on_commit(functools.partial(_bump, models))
+
+
+def _bump(models) -> None:
+    cache = caches[CACHE_ALIAS]
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Not set yet, or evicted: any fresh version invalidates
+            cache.set(key, time.time_ns(), timeout=None)
+        except Exception as e:
+            logger.warning("table_version_bump_failed", key=key, error=str(e))
+
+
+def _etag(request, version: str) -> str:
+    # Accept selects the representation, e.g. a columnar format
+    query = sorted(request.GET.lists())
+    accept = request.headers.get("Accept", "")
+    raw = f"{request.path}\n{query}\n{accept}\n{version}".encode()
+    return f'"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def _not_modified(request, etag: str) -> bool:
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or etag in etags or f"W/{etag}" in etags
+
+
+def cached_response(schema: Any, *models: Type[Model], timeout: Optional[int] = None):
+    """
+    Serve a GET endpoint with ETags and cache its serialized body.
+
+    Place it below the router decorator. The view's result is validated
+    against ``schema`` (the endpoint's ``response``) and rendered here, and
+    headers it sets on the temporal ``HttpResponse`` are cached with the body.
+    A successful ``HttpResponse`` the view renders itself is cached as is;
+    other responses it returns, such as errors, are not cached.
+
+    Args:
+        schema: Response schema of the endpoint
+        *models: Models whose tables the endpoint reads
+        timeout: Seconds cached bodies are kept (default: API_RESPONSE_CACHE_TIMEOUT)
+    """
+    adapter = TypeAdapter(schema)
+
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            version = table_version(*models)
+            if version is None:
+                return view_func(request, *args, **kwargs)
+
+            etag = _etag(request, version)
+            if _not_modified(request, etag):
+                response = HttpResponseNotModified()
+                response["ETag"] = etag
+                response["Cache-Control"] = CACHE_CONTROL
+                return response
+
+            cache = caches[CACHE_ALIAS]
+            key = f"response:{etag}"
+            cached = cache.get(key)
+            if cached is not None:
+                content, headers = cached
+            else:
+                result = view_func(request, *args, **kwargs)
+                if isinstance(result, HttpResponseBase):
+                    if result.status_code != 200 or result.streaming:
+                        return result
+                    # Rendered by the view itself, e.g. a columnar format
+                    content = result.content
+                    headers = dict(result.headers)
+                else:
+                    data = adapter.dump_python(
+                        adapter.validate_python(
+                            result, from_attributes=True, context={"request": request}
+                        )
+                    )
+                    content = renderer.render(request, data, response_status=200)
+                    headers = {
+                        "Content-Type": f"{renderer.media_type}; charset={renderer.charset}",
+                        **_view_headers(kwargs),
+                    }
+                cache.set(
+                    key,
+                    (content, headers),
+                    timeout=timeout
+                    or getattr(settings, "API_RESPONSE_CACHE_TIMEOUT", 60 * 60),
+                )
+
+            response = HttpResponse(content)
+            for name, value in headers.items():
+                response[name] = value
+            response["ETag"] = etag
+            response["Cache-Control"] = CACHE_CONTROL
+            response["Vary"] = "Accept"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _view_headers(kwargs: Dict[str, Any]) -> Dict[str, str]:
+    # Headers the view set on ninja's temporal response, e.g. X-Next-Cursor
+    for value in kwargs.values():
+        if isinstance(value, HttpResponse):
+            return {
+                name: header
+                for name, header in value.headers.items()
+                if name.lower() != "content-type"
+            }
+    return {}
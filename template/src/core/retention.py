@@ -0,0 +1,89 @@
+"""
+Retention of finished workflows in the DBOS system database.
+
+DBOS keeps every workflow's status, inputs, outputs and step results forever,
+so ``workflow_status`` and ``operation_outputs`` grow without bound and every
+list or status query slows down with them. ``daily_cleanup`` prunes them
+according to ``WORKFLOW_RETENTION_DAYS`` and ``WORKFLOW_RETENTION_DAYS_BY_NAME``,
+one small batch per DBOS step, so an interrupted run resumes where it stopped.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from dbos import DBOS
+from django.conf import settings
+
+from core import workflow_queries
+
+
+def retention_rules(now: datetime) -> List[Dict[str, Any]]:
+    """
+    Turn the retention settings into ``delete_expired_workflows`` arguments.
+
+    Per-name periods apply to every finished status of that workflow; per-status
+    periods apply to all other workflows.
+    """
+    by_name = getattr(settings, "WORKFLOW_RETENTION_DAYS_BY_NAME", {})
+    by_status = getattr(settings, "WORKFLOW_RETENTION_DAYS", {})
+
+    def cutoff(days: int) -> int:
+        return workflow_queries.to_epoch_ms(now - timedelta(days=days))
+
+    rules = [
+        {
+            "status": list(workflow_queries.TERMINAL_STATUSES),
+            "name": name,
+            "created_before": cutoff(days),
+        }
+        for name, days in by_name.items()
+    ]
+    rules += [
+        {
+            "status": [status],
+            "exclude_names": list(by_name),
+            "created_before": cutoff(days),
+        }
+        for status, days in by_status.items()
+    ]
+    return rules
+
+
+@DBOS.step()
+def delete_expired_step(rule: Dict[str, Any]) -> Tuple[int, int]:
+    return workflow_queries.delete_expired_workflows(
+        limit=getattr(settings, "WORKFLOW_RETENTION_BATCH_SIZE", 500), **rule
+    )
+
+
+def prune_workflows(now: datetime) -> Dict[str, Any]:
+    """
+    Delete every workflow past its retention period, batch by batch.
+
+    Must be called from a workflow: each batch is a step, so after a crash the
+    workflow's recovery skips the batches already deleted.
+
+    Returns:
+        Workflows deleted and approximate bytes reclaimed, in total and per rule.
+    """
+    totals = {"rows_deleted": 0, "bytes_reclaimed": 0, "batches": 0, "rules": []}
+    for rule in retention_rules(now):
+        rows_deleted = bytes_reclaimed = 0
+        while True:
+            rows, reclaimed = delete_expired_step(rule)
+            if not rows:
+                break
+            rows_deleted += rows
+            bytes_reclaimed += reclaimed
+            totals["batches"] += 1
+        totals["rows_deleted"] += rows_deleted
+        totals["bytes_reclaimed"] += bytes_reclaimed
+        totals["rules"].append(
+            {
+                "name": rule.get("name"),
+                "status": rule["status"],
+                "rows_deleted": rows_deleted,
+                "bytes_reclaimed": bytes_reclaimed,
+            }
+        )
+    return totals
@@ -0,0 +1,377 @@
+"""
+Incremental OHLC rollups of ``StockTicker`` into ``StockRollup``.
+
+Each refresh reads only the ticker rows written since the stored high-water
+mark, folds them into per-symbol 5m/1h/1d buckets in memory, and merges those
+into the stored buckets with a single upsert. Range queries then read one
+rollup row per bucket instead of scanning raw ticks. A window of ticks can
+also be folded in disjoint symbol partitions by separate workflows; each
+partition then keeps its own high-water mark, and the shared one only
+advances once every partition has folded the window.
+
+A symbol is always folded from the latest high-water mark that covers it,
+whether the shared one or that of a partition (under any partition count)
+that got ahead, so a partition that failed is caught up by the next refresh,
+inline or fanned out, without refolding what the others already did. The
+partition count comes from ``settings.AGGREGATION_PARTITIONS`` alone; change
+it while no aggregation is running, since folds under different counts do
+not wait for each other.
+
+``StockTicker`` keeps one row per symbol per trading day, rewritten with
+the day's latest price and cumulative volume, so a row updated several times
+between two refreshes contributes one tick, its latest snapshot. Each tick
+is bucketed at the time it was observed (see ``observed_at``): its write
+time if written on its trading day, else the start of that day, so a
+backfilled or corrected row lands in its own day, never in today's buckets.
+In a bucket, ``open`` and ``close`` are the first and last prices folded,
+and ``volume`` is the trading day's cumulative volume as of the last tick,
+not a sum: adding up snapshots would grow it with every rewrite of the row.
+``count`` is the number of ticks folded.
+"""
+
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import structlog
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone as django_timezone
+
+from core.models import RollupCheckpoint, StockRollup, StockTicker
+from core.response_cache import bump_table_version
+
+logger = structlog.get_logger(__name__)
+
+ROLLUP_INTERVALS = {
+    StockRollup.Interval.FIVE_MINUTES: timedelta(minutes=5),
+    StockRollup.Interval.HOUR: timedelta(hours=1),
+    StockRollup.Interval.DAY: timedelta(days=1),
+}
+# Name of the high-water mark of the StockTicker rollups
+CHECKPOINT_NAME = "stock_rollups"
+# Ticks newer than this are left for the next refresh, so rows from transactions
+# still in flight are not skipped past by the high-water mark (bulk loads, which
+# can run longer, hold the mark with lock_rollups instead)
+SETTLE_DELAY = timedelta(seconds=5)
+# Ticker rows read per round trip
+TICK_BATCH_SIZE = 5000
+# Upper bound of the partition count: each partition is a child workflow per refresh
+MAX_PARTITIONS = 64
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Bucket = Tuple[str, str, datetime]
+
+
+def bucket_start(moment: datetime, interval: str) -> datetime:
+    """Return the start of the ``interval`` bucket containing ``moment`` (UTC-aligned)."""
+    width = ROLLUP_INTERVALS[interval]
+    return _EPOCH + ((moment - _EPOCH) // width) * width
+
+
+def observed_at(day: date, written_at: datetime) -> datetime:
+    """
+    Return when a ticker row's snapshot was observed.
+
+    That is its write time if it was written on its trading ``day`` (UTC),
+    else the start of ``day``.
+    """
+    if written_at.astimezone(timezone.utc).date() == day:
+        return written_at
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _fold(
+    buckets: Dict[Bucket, List[Any]],
+    ticks: Iterable[Tuple[str, Decimal, int, date, datetime]],
+) -> int:
+    # buckets[(symbol, interval, start)] = [open, high, low, close, volume, count]
+    folded = 0
+    for symbol, price, volume, day, written_at in ticks:
+        folded += 1
+        moment = observed_at(day, written_at)
+        for interval in ROLLUP_INTERVALS:
+            key = (symbol, interval, bucket_start(moment, interval))
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [price, price, price, price, volume, 1]
+            else:
+                bucket[1] = max(bucket[1], price)
+                bucket[2] = min(bucket[2], price)
+                bucket[3] = price
+                # Cumulative for the day: the latest snapshot wins
+                bucket[4] = volume
+                bucket[5] += 1
+    return folded
+
+
+def _merge(buckets: Dict[Bucket, List[Any]]) -> int:
+    """Merge folded buckets into the stored ones and upsert the result."""
+    if not buckets:
+        return 0
+
+    # Stored buckets overlapping the new ticks; they precede them in time
+    existing: Dict[Bucket, StockRollup] = {}
+    for interval in ROLLUP_INTERVALS:
+        keys = [key for key in buckets if key[1] == interval]
+        if not keys:
+            continue
+        stored = StockRollup.objects.filter(
+            interval=interval,
+            symbol__in={key[0] for key in keys},
+            bucket_start__gte=min(key[2] for key in keys),
+            bucket_start__lte=max(key[2] for key in keys),
+        )
+        existing.update(
+            ((row.symbol, row.interval, row.bucket_start), row) for row in stored
+        )
+
+    rollups = []
+    for key, (open_, high, low, close, volume, count) in buckets.items():
+        previous = existing.get(key)
+        if previous is not None:
+            open_ = previous.open
+            high = max(previous.high, high)
+            low = min(previous.low, low)
+            count += previous.count
+        symbol, interval, start = key
+        rollups.append(
+            StockRollup(
+                symbol=symbol,
+                interval=interval,
+                bucket_start=start,
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=volume,
+                count=count,
+            )
+        )
+
+    StockRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=["symbol", "interval", "bucket_start"],
+        update_fields=["open", "high", "low", "close", "volume", "count", "updated_at"],
+    )
+    bump_table_version(StockRollup)
+    return len(rollups)
+
+
+def partition_of(symbol: str, partitions: int) -> int:
+    """Return the partition of ``symbol`` among ``partitions``; stable across processes."""
+    return zlib.crc32(symbol.encode()) % partitions
+
+
+def _ticks(lower: datetime, upper: datetime, symbols: Optional[Sequence[str]] = None):
+    ticks = StockTicker.objects.filter(updated_at__gt=lower, updated_at__lte=upper)
+    if symbols is not None:
+        ticks = ticks.filter(symbol__in=symbols)
+    return (
+        ticks.order_by("updated_at")
+        .values_list("symbol", "price", "volume", "date", "updated_at")
+        .iterator(chunk_size=TICK_BATCH_SIZE)
+    )
+
+
+def fold_window(
+    lower: datetime, upper: datetime, symbols: Optional[Sequence[str]] = None
+) -> Dict[str, int]:
+    """
+    Fold the ticks written in ``(lower, upper]`` into the rollups, in one transaction.
+
+    With ``symbols``, only those symbols are folded; callers folding a window
+    in parts must give each part disjoint symbols.
+
+    Returns:
+        Ticks processed and buckets written.
+    """
+    with transaction.atomic():
+        buckets: Dict[Bucket, List[Any]] = {}
+        folded = _fold(buckets, _ticks(lower, upper, symbols))
+        written = _merge(buckets)
+    return {"ticks": folded, "buckets": written}
+
+
+def changed_symbols(lower: datetime, upper: datetime) -> Dict[str, datetime]:
+    """Symbols with ticks written in ``(lower, upper]``, with their latest write."""
+    return dict(
+        StockTicker.objects.filter(updated_at__gt=lower, updated_at__lte=upper)
+        .order_by()
+        .values("symbol")
+        .annotate(latest=Max("updated_at"))
+        .values_list("symbol", "latest")
+    )
+
+
+def _lock_checkpoint() -> RollupCheckpoint:
+    checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(
+        name=CHECKPOINT_NAME, defaults={"position": _EPOCH}
+    )
+    return checkpoint
+
+
+def lock_rollups() -> None:
+    """
+    Hold the rollup high-water mark until the current transaction ends.
+
+    A bulk load calls this before writing: refreshes and fan-outs then wait
+    for it to commit before choosing their window, so rows stamped with the
+    load's start time never end up behind the mark, however long it runs.
+    """
+    _lock_checkpoint()
+
+
+def _partition_checkpoints():
+    return RollupCheckpoint.objects.filter(name__startswith=f"{CHECKPOINT_NAME}:")
+
+
+def _partition_marks(after: datetime) -> List[Tuple[int, int, datetime]]:
+    """Partition high-water marks beyond ``after``, as (partition, partitions, position)."""
+    marks = []
+    for name, position in _partition_checkpoints().filter(
+        position__gt=after
+    ).values_list("name", "position"):
+        partition, partitions = name.rpartition(":")[2].split("/")
+        marks.append((int(partition), int(partitions), position))
+    return marks
+
+
+def _fold_changed(
+    lower: datetime, upper: datetime, partition: int = 0, partitions: int = 1
+) -> Dict[str, int]:
+    """
+    Fold the symbols of one partition changed in ``(lower, upper]``.
+
+    Each symbol is folded from the latest partition high-water mark covering
+    it, if one is ahead of ``lower``.
+    """
+    marks = _partition_marks(lower)
+    starts: Dict[datetime, List[str]] = {}
+    for symbol, latest in changed_symbols(lower, upper).items():
+        if partition_of(symbol, partitions) != partition:
+            continue
+        start = max(
+            [lower] + [mark for p, n, mark in marks if partition_of(symbol, n) == p]
+        )
+        if start < latest:
+            starts.setdefault(start, []).append(symbol)
+
+    result = {"ticks": 0, "buckets": 0, "symbols": 0}
+    for start, symbols in starts.items():
+        folded = fold_window(start, upper, symbols)
+        result["ticks"] += folded["ticks"]
+        result["buckets"] += folded["buckets"]
+        result["symbols"] += len(symbols)
+    return result
+
+
+def next_window(now: Optional[datetime] = None) -> Optional[Tuple[datetime, datetime]]:
+    """
+    Return the window of ticks written since the high-water mark, to be folded in partitions.
+
+    The high-water mark is not moved: fold each partition of the window with
+    ``fold_partition``, then call ``complete_window`` once all have succeeded.
+
+    Returns:
+        The ``(lower, upper]`` window, or ``None`` if there is nothing new.
+    """
+    # Locked so an inline refresh or bulk load in progress finishes first
+    with transaction.atomic():
+        checkpoint = _lock_checkpoint()
+    upper = (now or django_timezone.now()) - SETTLE_DELAY
+    if checkpoint.position >= upper:
+        return None
+    return checkpoint.position, upper
+
+
+def fold_partition(
+    lower: datetime, upper: datetime, partition: int, partitions: int
+) -> Dict[str, int]:
+    """
+    Fold the ticks of one symbol-hash partition of ``(lower, upper]`` into the rollups.
+
+    The partition's own high-water mark is locked and advanced in the same
+    transaction as the fold, so ticks a partition already folded, in an
+    earlier attempt or a concurrent refresh, are skipped, and a partition
+    that failed catches up in the next window.
+
+    Returns:
+        Ticks processed, buckets written and symbols folded.
+
+    Raises:
+        ValueError: If ``partitions`` is not between 1 and ``MAX_PARTITIONS``.
+    """
+    if not 1 <= partitions <= MAX_PARTITIONS:
+        raise ValueError(f"partitions must be between 1 and {MAX_PARTITIONS}")
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(
+            name=f"{CHECKPOINT_NAME}:{partition}/{partitions}",
+            defaults={"position": lower},
+        )
+        start = max(checkpoint.position, lower)
+        if start >= upper:
+            return {"ticks": 0, "buckets": 0, "symbols": 0}
+
+        result = _fold_changed(start, upper, partition, partitions)
+
+        checkpoint.position = upper
+        checkpoint.save(update_fields=["position", "updated_at"])
+    return result
+
+
+def complete_window(upper: datetime) -> None:
+    """Advance the high-water mark to ``upper`` once every partition has folded up to it."""
+    with transaction.atomic():
+        checkpoint = _lock_checkpoint()
+        # A concurrent refresh may already have completed a later window
+        if checkpoint.position < upper:
+            checkpoint.position = upper
+            checkpoint.save(update_fields=["position", "updated_at"])
+        # Partition marks the shared one has caught up with no longer matter
+        _partition_checkpoints().filter(position__lte=checkpoint.position).delete()
+
+
+def refresh_stock_rollups(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Fold every ticker row written since the last refresh into the rollups.
+
+    The checkpoint row, and those of the partitions, are locked for the
+    duration, so concurrent refreshes and partition folds run one after
+    another rather than double counting ticks. Partitions left ahead by a
+    fan-out that partly failed are caught up from their own marks.
+
+    Returns:
+        Ticks processed, buckets written and the new high-water mark.
+    """
+    with transaction.atomic():
+        checkpoint = _lock_checkpoint()
+        list(_partition_checkpoints().select_for_update())
+        # Taken once the locks are held, so a bulk load that held them is covered
+        upper = (now or django_timezone.now()) - SETTLE_DELAY
+        if checkpoint.position >= upper:
+            return {"ticks": 0, "buckets": 0, "position": checkpoint.position}
+
+        result = _fold_changed(checkpoint.position, upper)
+
+        checkpoint.position = upper
+        checkpoint.save(update_fields=["position", "updated_at"])
+        _partition_checkpoints().filter(position__lte=upper).delete()
+
+    logger.info("stock_rollups_refreshed", **result)
+    return {**result, "position": upper}
+
+
+def summarize_rollups(since: datetime) -> Dict[str, Any]:
+    """Summarise the 5-minute rollups starting at or after ``since``."""
+    return StockRollup.objects.filter(
+        interval=StockRollup.Interval.FIVE_MINUTES, bucket_start__gte=since
+    ).aggregate(
+        data_points=Coalesce(Sum("count"), 0),
+        buckets=Count("id"),
+        symbols=Count("symbol", distinct=True),
+    )
@@ -0,0 +1,113 @@
+"""
+Reads and writes of the ``StockTicker`` table.
+"""
+
+import base64
+import binascii
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import StockTicker
+from core.response_cache import bump_table_version
+
+# Fields overwritten when a ticker for the same (symbol, date) already exists
+UPSERT_FIELDS = (
+    "company_name",
+    "price",
+    "change",
+    "percent_change",
+    "volume",
+    "market_cap",
+    "updated_at",
+)
+
+
+def upsert_tickers(
+    tickers: Iterable[StockTicker], update_fields: Sequence[str] = UPSERT_FIELDS
+) -> int:
+    """
+    Insert tickers, updating the existing row for any (symbol, date) already stored.
+
+    Runs as a single ``INSERT ... ON CONFLICT (symbol, date) DO UPDATE`` (split
+    into batches only where the database limits query parameters, as SQLite
+    does), so thousands of symbols are written in one round trip instead of a
+    query per row.
+
+    Returns:
+        The number of tickers written.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return 0
+    StockTicker.objects.bulk_create(
+        tickers,
+        update_conflicts=True,
+        unique_fields=["symbol", "date"],
+        update_fields=list(update_fields),
+    )
+    # bulk_create sends no signals
+    bump_table_version(StockTicker)
+    return len(tickers)
+
+
+def distinct_symbols() -> List[str]:
+    """Every symbol with stored tickers, sorted; read from the index alone."""
+    return list(
+        StockTicker.objects.order_by("symbol")
+        .values_list("symbol", flat=True)
+        .distinct()
+    )
+
+
+def latest_tickers(symbols: Optional[Sequence[str]] = None) -> QuerySet:
+    """
+    The newest ticker of each symbol (optionally only ``symbols``), by symbol.
+
+    On PostgreSQL this is a ``DISTINCT ON (symbol)`` walk of the
+    (symbol, date DESC) index, reading one row per symbol. Other databases
+    look up each symbol's newest date through the same index instead.
+    """
+    tickers = StockTicker.objects.all()
+    if symbols is not None:
+        tickers = tickers.filter(symbol__in=symbols)
+    if connection.features.can_distinct_on_fields:
+        return tickers.order_by("symbol", "-date").distinct("symbol")
+    newest = (
+        StockTicker.objects.filter(symbol=OuterRef("symbol"))
+        .order_by("-date")
+        .values("date")[:1]
+    )
+    return tickers.filter(date=Subquery(newest)).order_by("symbol")
+
+
+@receiver(post_save, sender=StockTicker)
+@receiver(post_delete, sender=StockTicker)
+def invalidate_stock_responses(sender, **kwargs):
+    """Invalidate cached stock responses when a ticker is saved or deleted, e.g. in the admin."""
+    bump_table_version(StockTicker)
+
+
+def encode_stock_cursor(day: date, symbol: str) -> str:
+    """Encode a (date, symbol) keyset position as an opaque cursor."""
+    raw = f"{day.isoformat()}:{symbol}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_stock_cursor(cursor: str) -> Tuple[date, str]:
+    """
+    Decode a cursor produced by ``encode_stock_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        day, symbol = base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        return date.fromisoformat(day), symbol
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -1,14 +1,90 @@
-from django.test import TestCase, Client
+import asyncio
+import gzip
+import io
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock, skipUnless
+
+import sqlalchemy as sa
+from asgiref.sync import async_to_sync
+from dbos import DBOS, SetWorkflowID
+from django.test import RequestFactory, SimpleTestCase, TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from ninja import Schema
+from django.db import DataError, connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import caches
 from django_valkey import get_valkey_connection
 
-from core.models import StockTicker
+from api.v1.tasks.router import MAX_BULK_COUNT
+from core import bulk_cancel, columnar, downsample, workflow_export, workflow_queries
+from core.aio import dbos_async_view
+from core.cron_jobs import daily_cleanup
+from core.downsample import lttb
+from core.renderers import ORJSONRenderer, render_schema_results
+from core.ingest import ingest_tickers
+from core.queues import QUEUES, aggregation_queue, enqueue_bulk_async
+from core.idempotency import get_idempotency_key, idempotent_workflow_id
+from core.retention import retention_rules
+from core.rollups import (
+    MAX_PARTITIONS,
+    bucket_start,
+    complete_window,
+    fold_partition,
+    next_window,
+    refresh_stock_rollups,
+)
+from core.stocks import upsert_tickers
+from core.workflow_cache import TerminalWorkflowCache
+from core.workflow_feed import WorkflowChangeFeed, format_sse
+from core.models import RollupCheckpoint, StockRollup, StockTicker
 
 User = get_user_model()
 
 
+@DBOS.step()
+def echo_step(value):
+    return value
+
+
+@DBOS.workflow()
+def echo_workflow(value, fail=False):
+    echo_step(value)
+    if fail:
+        raise ValueError(f"failed on {value}")
+    return {"echo": value}
+
+
+@DBOS.step(retries_allowed=False)
+def failing_step():
+    raise ValueError("step failed")
+
+
+@DBOS.workflow()
+def steps_workflow(sizes):
+    for size in sizes:
+        echo_step("x" * size)
+    try:
+        failing_step()
+    except ValueError:
+        pass
+
+
+@DBOS.workflow()
+def waiting_workflow(timeout=30):
+    # Stays PENDING until sent a message on "go"
+    return DBOS.recv("go", timeout_seconds=timeout)
+
+
 class ViewTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -130,3 +206,1269 @@ class APITests(TestCase):
         # The test client re-raises exceptions in DEBUG mode, so we expect the exception
         with self.assertRaisesMessage(Exception, "This is a test exception for Sentry"):
             self.client.get("/api/v1/sentry-debug")
+
+
+class StockUpsertTests(TestCase):
+    def ticker(self, symbol, price):
+        return StockTicker(
+            symbol=symbol,
+            company_name=f"{symbol} Inc.",
+            price=price,
+            change=0,
+            percent_change=0,
+            volume=1000,
+            date=date(2025, 1, 2),
+        )
+
+    def test_upsert_updates_existing_symbol_and_date(self):
+        """Test that upserting the same (symbol, date) updates the row instead of duplicating it"""
+        upsert_tickers([self.ticker("AAA", 10), self.ticker("BBB", 20)])
+        written = upsert_tickers([self.ticker("AAA", 11), self.ticker("CCC", 30)])
+
+        self.assertEqual(written, 2)
+        prices = dict(
+            StockTicker.objects.filter(date=date(2025, 1, 2)).values_list("symbol", "price")
+        )
+        self.assertEqual(prices, {"AAA": 11, "BBB": 20, "CCC": 30})
+
+
+class StockPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="staff", password="testpass123", email="staff@example.com", is_staff=True
+        )
+        self.client.login(username="staff", password="testpass123")
+        StockTicker.objects.all().delete()
+        upsert_tickers(
+            StockTicker(
+                symbol=symbol,
+                company_name=symbol,
+                price=1,
+                change=0,
+                percent_change=0,
+                volume=1,
+                date=day,
+            )
+            for symbol, day in [
+                ("AAA", date(2025, 1, 2)),
+                ("BBB", date(2025, 1, 2)),
+                ("AAA", date(2025, 1, 1)),
+            ]
+        )
+
+    def test_keyset_pages(self):
+        """Test that pages follow (-date, symbol) order and hand over via X-Next-Cursor"""
+        response = self.client.get("/api/v1/example/stocks?limit=2")
+        self.assertEqual(
+            [(row["symbol"], row["date"]) for row in response.json()],
+            [("AAA", "2025-01-02"), ("BBB", "2025-01-02")],
+        )
+        cursor = response["X-Next-Cursor"]
+
+        response = self.client.get(f"/api/v1/example/stocks?limit=2&cursor={cursor}")
+        self.assertEqual(
+            [(row["symbol"], row["date"]) for row in response.json()],
+            [("AAA", "2025-01-01")],
+        )
+        self.assertNotIn("X-Next-Cursor", response)
+
+        response = self.client.get("/api/v1/example/stocks?start_date=2025-01-02")
+        self.assertEqual(len(response.json()), 2)
+        response = self.client.get("/api/v1/example/stocks?cursor=bogus")
+        self.assertEqual(response.status_code, 400)
+
+    def test_symbols_and_latest(self):
+        """Test distinct symbols and the newest row of each symbol"""
+        response = self.client.get("/api/v1/example/stocks/symbols")
+        self.assertEqual(response.json(), ["AAA", "BBB"])
+
+        response = self.client.get("/api/v1/example/stocks/latest")
+        self.assertEqual(
+            [(row["symbol"], row["date"]) for row in response.json()],
+            [("AAA", "2025-01-02"), ("BBB", "2025-01-02")],
+        )
+        response = self.client.get("/api/v1/example/stocks/latest?symbol=aaa")
+        self.assertEqual([row["symbol"] for row in response.json()], ["AAA"])
+
+    def test_columnar_json(self):
+        """Test that Accept selects column-oriented JSON, with the page cursor kept"""
+        response = self.client.get(
+            "/api/v1/example/stocks?limit=2", HTTP_ACCEPT=columnar.COLUMNAR_JSON
+        )
+        self.assertTrue(response["Content-Type"].startswith(columnar.COLUMNAR_JSON))
+        self.assertIn("X-Next-Cursor", response)
+        body = response.json()
+        self.assertEqual(body["length"], 2)
+        self.assertEqual(body["columns"]["symbol"], ["AAA", "BBB"])
+        self.assertEqual(body["columns"]["price"], [1.0, 1.0])
+
+    @skipUnless(columnar.pyarrow, "pyarrow is not installed")
+    def test_arrow_stream(self):
+        """Test that Accept selects an Arrow IPC stream"""
+        response = self.client.get(
+            "/api/v1/example/stocks", HTTP_ACCEPT=columnar.ARROW_STREAM
+        )
+        table = columnar.pyarrow.ipc.open_stream(response.content).read_all()
+        self.assertEqual(table.column("symbol").to_pylist(), ["AAA", "BBB", "AAA"])
+
+    def test_series(self):
+        """Test that the series endpoint returns a symbol's history oldest first"""
+        response = self.client.get("/api/v1/example/stocks/series?symbol=AAA")
+        self.assertEqual(
+            [row["date"] for row in response.json()], ["2025-01-01", "2025-01-02"]
+        )
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "valkey": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+)
+class StockResponseCacheTests(TestCase):
+    def setUp(self):
+        User.objects.create_user(
+            username="staff", password="testpass123", email="staff@example.com", is_staff=True
+        )
+        self.client.login(username="staff", password="testpass123")
+        StockTicker.objects.all().delete()
+        self.write(("AAA", 1))
+
+    def write(self, *rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            upsert_tickers(
+                StockTicker(
+                    symbol=symbol,
+                    company_name=symbol,
+                    price=price,
+                    change=0,
+                    percent_change=0,
+                    volume=1,
+                    date=date(2025, 1, 1),
+                )
+                for symbol, price in rows
+            )
+
+    @staticmethod
+    def stock_queries(queries):
+        # Authentication still reads the session and user
+        table = StockTicker._meta.db_table
+        return [query for query in queries.captured_queries if table in query["sql"]]
+
+    def test_etag_revalidation(self):
+        """Test that unchanged stocks answer If-None-Match with 304 and writes change the ETag"""
+        response = self.client.get("/api/v1/example/stocks")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/v1/example/stocks", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertFalse(self.stock_queries(queries))
+        self.assertEqual(response.status_code, 304)
+
+        self.write(("AAA", 2))
+        response = self.client.get("/api/v1/example/stocks", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()[0]["price"], 2)
+
+    def test_body_is_cached(self):
+        """Test that a repeated request is served from the cache with the view's headers"""
+        self.write(("BBB", 1))
+        first = self.client.get("/api/v1/example/stocks?limit=1")
+        self.assertIn("X-Next-Cursor", first)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get("/api/v1/example/stocks?limit=1")
+        self.assertFalse(self.stock_queries(queries))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["X-Next-Cursor"], first["X-Next-Cursor"])
+
+        columns = self.client.get(
+            "/api/v1/example/stocks?limit=1", HTTP_ACCEPT=columnar.COLUMNAR_JSON
+        )
+        self.assertNotEqual(columns["ETag"], first["ETag"])
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(
+                "/api/v1/example/stocks?limit=1", HTTP_ACCEPT=columnar.COLUMNAR_JSON
+            )
+        self.assertFalse(self.stock_queries(queries))
+        self.assertEqual(cached["Content-Type"], columns["Content-Type"])
+        self.assertEqual(cached["X-Next-Cursor"], first["X-Next-Cursor"])
+
+
+class RendererTests(SimpleTestCase):
+    def test_orjson_matches_ninja_types(self):
+        """Test that the orjson renderer encodes the types Ninja's encoder does"""
+        content = ORJSONRenderer().render(
+            None,
+            {"price": Decimal("1.50"), "day": date(2025, 1, 1), 1: None},
+            response_status=200,
+        )
+        self.assertEqual(json.loads(content), {"price": "1.50", "day": "2025-01-01", "1": None})
+
+    def test_schema_results_skip_ninja(self):
+        """Test that returned schema objects are rendered directly, keeping view headers"""
+
+        class Greeting(Schema):
+            message: str
+
+        @render_schema_results
+        async def view(request, response):
+            response["X-Test"] = "1"
+            return Greeting(message="hi")
+
+        response = async_to_sync(view)(None, response=HttpResponse())
+        self.assertEqual(json.loads(response.content), {"message": "hi"})
+        self.assertEqual(response["X-Test"], "1")
+
+        passthrough = render_schema_results(lambda request: (400, {"message": "no"}))
+        self.assertEqual(passthrough(None), (400, {"message": "no"}))
+
+
+class StockIngestTests(TestCase):
+    CSV = (
+        b"symbol,company_name,price,change,percent_change,volume,market_cap,date\n"
+        b"aaa,A Corp,10.50,0.50,5.00,100,1000,2025-01-01\n"
+        b"BBB,B Corp,20.00,-1.00,-4.76,200,,2025-01-01\n"
+        b"AAA,A Corp,11.00,0.50,4.76,300,,2025-01-01\n"
+    )
+
+    def setUp(self):
+        StockTicker.objects.all().delete()
+
+    def test_csv_upsert(self):
+        """Test that the last row per (symbol, date) wins and a missing market cap is kept"""
+        self.assertEqual(ingest_tickers(io.BytesIO(self.CSV), "csv"), 3)
+        aaa = StockTicker.objects.get(symbol="AAA")
+        self.assertEqual((aaa.price, aaa.volume, aaa.market_cap), (Decimal("11.00"), 300, 1000))
+        self.assertIsNone(StockTicker.objects.get(symbol="BBB").market_cap)
+
+        line = b'{"symbol": "AAA", "company_name": "A Corp", "price": 12, "change": 1, "percent_change": 9.09, "volume": 400, "date": "2025-01-01"}\n'
+        self.assertEqual(ingest_tickers(io.BytesIO(line), "ndjson"), 1)
+        aaa.refresh_from_db()
+        self.assertEqual((aaa.price, aaa.market_cap), (Decimal("12.00"), 1000))
+        self.assertEqual(StockTicker.objects.count(), 2)
+
+    def test_bad_row_rolls_back(self):
+        """Test that a malformed row aborts the whole load"""
+        data = self.CSV + b"CCC,C Corp,oops,0,0,1,,2025-01-01\n"
+        with self.assertRaisesMessage(ValueError, "Row 4"):
+            ingest_tickers(io.BytesIO(data), "csv")
+        self.assertFalse(StockTicker.objects.exists())
+
+        with self.assertRaisesMessage(ValueError, "Line 2: expected a JSON object"):
+            ingest_tickers(io.BytesIO(b"\n[1, 2]\n"), "ndjson")
+
+    def test_load_holds_rollup_mark(self):
+        """Test that the rollup mark is held before any row is written, and the rows then fold"""
+        with mock.patch(
+            "core.ingest.lock_rollups",
+            side_effect=lambda: self.assertFalse(StockTicker.objects.exists()),
+        ) as lock:
+            ingest_tickers(io.BytesIO(self.CSV), "csv")
+        lock.assert_called_once_with()
+        result = refresh_stock_rollups(now=datetime.now(timezone.utc) + timedelta(minutes=1))
+        self.assertEqual(result["ticks"], 2)
+
+    @skipUnless(connection.vendor == "postgresql", "COPY needs PostgreSQL")
+    def test_copy_rejects_bad_value(self):
+        """Test that a value PostgreSQL rejects during COPY raises Django's DataError"""
+        data = self.CSV + b"CCC,C Corp,1e20,0,0,1,,2025-01-01\n"
+        with self.assertRaises(DataError):
+            ingest_tickers(io.BytesIO(data), "csv")
+        self.assertFalse(StockTicker.objects.exists())
+
+    def test_upload(self):
+        """Test the ingest endpoint with a multipart upload"""
+        User.objects.create_user(username="staff", password="testpass123", is_staff=True)
+        self.client.login(username="staff", password="testpass123")
+        upload = SimpleUploadedFile("history.csv", self.CSV, content_type="text/csv")
+        response = self.client.post("/api/v1/example/stocks/ingest", {"file": upload})
+        self.assertEqual(response.json(), {"rows_loaded": 3})
+
+        upload = SimpleUploadedFile("history.ndjson", b"{}\n")
+        response = self.client.post("/api/v1/example/stocks/ingest", {"file": upload})
+        self.assertEqual(response.status_code, 400)
+
+
+class DownsampleTests(SimpleTestCase):
+    def test_lttb_keeps_extremes(self):
+        """Test that LTTB returns the target count, the endpoints and an isolated spike"""
+        xs = list(range(1000))
+        ys = [0.0] * 1000
+        ys[437] = 100.0
+        keep = lttb(xs, ys, 50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertEqual(keep, sorted(keep))
+        self.assertIn(437, keep)
+        self.assertEqual(lttb(xs[:10], ys[:10], 50), list(range(10)))
+
+    @skipUnless(downsample.numpy is not None, "numpy is not installed")
+    def test_numpy_matches_loop(self):
+        """Test that the vectorised path keeps the same points as the Python loop"""
+        rng = downsample.numpy.random.default_rng(1)
+        xs = list(range(20_000))
+        ys = rng.normal(size=20_000).cumsum().tolist()
+        for threshold in (3, 50, 999):
+            with self.subTest(threshold=threshold):
+                with mock.patch.object(downsample, "numpy", None):
+                    expected = lttb(xs, ys, threshold)
+                with mock.patch.object(downsample, "MIN_VECTOR_BUCKET", 0):
+                    self.assertEqual(lttb(xs, ys, threshold), expected)
+
+
+class StockRollupTests(TestCase):
+    def tick(self, symbol, day, price, volume, at):
+        upsert_tickers([
+            StockTicker(
+                symbol=symbol,
+                company_name=symbol,
+                price=price,
+                change=0,
+                percent_change=0,
+                volume=volume,
+                date=day,
+            )
+        ])
+        StockTicker.objects.filter(symbol=symbol, date=day).update(updated_at=at)
+
+    def test_refresh_is_incremental(self):
+        """Test that refreshes only fold new ticks and merge them into stored buckets"""
+        t0 = datetime(2025, 1, 2, 10, 1, tzinfo=timezone.utc)
+        self.tick("AAA", date(2025, 1, 2), 10, 100, t0)
+        self.tick("BBB", date(2025, 1, 2), 50, 500, t0)
+        first = refresh_stock_rollups(now=t0 + timedelta(minutes=1))
+        self.assertEqual((first["ticks"], first["buckets"]), (2, 6))
+
+        # AAA moves twice more within the same 5-minute bucket
+        self.tick("AAA", date(2025, 1, 2), 12, 150, t0 + timedelta(minutes=2))
+        refresh_stock_rollups(now=t0 + timedelta(minutes=3))
+        self.tick("AAA", date(2025, 1, 2), 9, 180, t0 + timedelta(minutes=3))
+        last = refresh_stock_rollups(now=t0 + timedelta(minutes=4))
+        self.assertEqual(last["ticks"], 1)
+
+        bar = StockRollup.objects.get(
+            symbol="AAA",
+            interval="5m",
+            bucket_start=datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            (bar.open, bar.high, bar.low, bar.close, bar.volume, bar.count),
+            (10, 12, 9, 9, 180, 3),
+        )
+        self.assertEqual(
+            bucket_start(t0, "1d"), datetime(2025, 1, 2, tzinfo=timezone.utc)
+        )
+
+    def test_backfilled_rows_land_on_their_trading_day(self):
+        """Test that a row written after its trading day is bucketed at that day's start"""
+        t0 = datetime(2025, 1, 2, 10, 1, tzinfo=timezone.utc)
+        self.tick("AAA", date(2024, 12, 20), 10, 100, t0)
+        refresh_stock_rollups(now=t0 + timedelta(minutes=1))
+        self.assertEqual(
+            set(StockRollup.objects.values_list("interval", "bucket_start")),
+            {
+                (interval, datetime(2024, 12, 20, tzinfo=timezone.utc))
+                for interval in ("5m", "1h", "1d")
+            },
+        )
+
+    def test_failed_partition_is_folded_by_next_window(self):
+        """Test that the checkpoint waits for every partition and no tick is folded twice"""
+        t0 = datetime(2025, 1, 2, 10, 1, tzinfo=timezone.utc)
+        # AAA hashes to partition 1 of 2, DDD to partition 0
+        self.tick("AAA", date(2025, 1, 2), 10, 100, t0)
+        self.tick("DDD", date(2025, 1, 2), 50, 500, t0)
+        lower, upper = next_window(now=t0 + timedelta(minutes=1))
+        self.assertEqual(fold_partition(lower, upper, 1, 2)["ticks"], 1)
+        with mock.patch("core.rollups.fold_window", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                fold_partition(lower, upper, 0, 2)
+
+        # The window is handed out again, extended; AAA's tick is not refolded
+        self.tick("AAA", date(2025, 1, 2), 12, 100, t0 + timedelta(minutes=2))
+        retry_lower, retry_upper = next_window(now=t0 + timedelta(minutes=3))
+        self.assertEqual(retry_lower, lower)
+        self.assertEqual(fold_partition(retry_lower, retry_upper, 1, 2)["ticks"], 1)
+        self.assertEqual(fold_partition(retry_lower, retry_upper, 0, 2)["ticks"], 1)
+        complete_window(retry_upper)
+        self.assertIsNone(next_window(now=t0 + timedelta(minutes=3)))
+
+        counts = dict(
+            StockRollup.objects.filter(interval="1d").values_list("symbol", "count")
+        )
+        self.assertEqual(counts, {"AAA": 2, "DDD": 1})
+
+    def test_inline_refresh_after_failed_fan_out(self):
+        """Test that an inline refresh skips what the partitions of a failed fan-out folded"""
+        t0 = datetime(2025, 1, 2, 10, 1, tzinfo=timezone.utc)
+        self.tick("AAA", date(2025, 1, 2), 10, 100, t0)
+        self.tick("DDD", date(2025, 1, 2), 50, 500, t0)
+        lower, upper = next_window(now=t0 + timedelta(minutes=1))
+        fold_partition(lower, upper, 1, 2)
+
+        # DDD's partition never ran; a later inline refresh folds it alone
+        self.tick("DDD", date(2025, 1, 2), 52, 500, t0 + timedelta(minutes=2))
+        result = refresh_stock_rollups(now=t0 + timedelta(minutes=3))
+        self.assertEqual((result["ticks"], result["symbols"]), (1, 1))
+        counts = dict(
+            StockRollup.objects.filter(interval="1d").values_list("symbol", "count")
+        )
+        self.assertEqual(counts, {"AAA": 1, "DDD": 1})
+        self.assertFalse(
+            RollupCheckpoint.objects.filter(name__startswith="stock_rollups:").exists()
+        )
+
+        with self.assertRaises(ValueError):
+            fold_partition(lower, upper, 0, MAX_PARTITIONS + 1)
+
+
+class WorkflowQueryTests(SimpleTestCase):
+    def test_cursor_round_trip(self):
+        """Test that list cursors decode to the keyset position they encode"""
+        cursor = workflow_queries.encode_cursor(1700000000123, "wf:with:colons")
+        self.assertEqual(
+            workflow_queries.decode_cursor(cursor), (1700000000123, "wf:with:colons")
+        )
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors are rejected"""
+        with self.assertRaises(ValueError):
+            workflow_queries.decode_cursor("not-a-cursor")
+
+    def test_format_sse(self):
+        """Test Server-Sent Events framing for workflow change events"""
+        message = format_sse("workflow", {"status": "SUCCESS"}, event_id="abc")
+        self.assertEqual(
+            message, 'id: abc\nevent: workflow\ndata: {"status": "SUCCESS"}\n\n'
+        )
+
+    def test_gzip_export_is_one_stream(self):
+        """Test that a chunked gzip export decompresses to one NDJSON line per workflow"""
+        rows = [
+            {
+                "workflow_uuid": f"wf-{i}",
+                "name": "job",
+                "status": "SUCCESS",
+                "queue_name": "bulk",
+                "application_version": "v1",
+                "created_at": 1700000000000,
+                "started_at_epoch_ms": 1700000000250,
+                "updated_at": 1700000001000,
+            }
+            for i in range(500)
+        ]
+        with mock.patch.object(
+            workflow_queries, "iter_workflows", return_value=iter(rows)
+        ), mock.patch.object(workflow_export, "EXPORT_CHUNK_SIZE", 1024):
+            chunks = list(workflow_export.stream_export(compress=True))
+
+        self.assertGreater(len(chunks), 1)
+        lines = gzip.decompress(b"".join(chunks)).splitlines()
+        self.assertEqual(len(lines), 500)
+        record = json.loads(lines[-1])
+        self.assertEqual(record["workflow_id"], "wf-499")
+        self.assertEqual((record["queue_wait_ms"], record["execution_ms"]), (250, 750))
+
+
+class WorkflowFeedTests(SimpleTestCase):
+    def change(self, workflow_id, updated_at):
+        return {
+            "workflow_uuid": workflow_id,
+            "name": "job",
+            "status": "SUCCESS",
+            "created_at": updated_at,
+            "updated_at": updated_at,
+            "application_version": "v1",
+        }
+
+    def test_result_waiters_do_not_count_statuses(self):
+        """Test that waiting for a workflow follows changes without the status aggregate"""
+        feed = WorkflowChangeFeed(poll_interval=0.01)
+        changes = []
+
+        def list_changes(after, limit, **bounds):
+            return [row for row in changes if (row["updated_at"], row["workflow_uuid"]) > after]
+
+        async def done():
+            return any(row["workflow_uuid"] == "wf-1" for row in changes)
+
+        async def wait():
+            waiting = asyncio.create_task(feed.wait_for_workflow("wf-1", done, timeout=10))
+            await asyncio.sleep(0.05)
+            later = feed.current_position()[0] + 1000
+            changes.extend([self.change("wf-0", later), self.change("wf-1", later + 1)])
+            return await asyncio.wait_for(waiting, 5)
+
+        with mock.patch.object(
+            workflow_queries, "list_workflow_changes", side_effect=list_changes
+        ), mock.patch.object(workflow_queries, "count_workflows_by_status") as counts:
+            self.assertTrue(asyncio.run(wait()))
+            counts.assert_not_called()
+
+            counts.return_value = ({"SUCCESS": 2}, 0)
+            stream = feed.stream()
+            self.assertEqual(next(stream), "retry: 3000\n\n")
+            # A keep-alive may come first, before the feed has counted
+            for _, message in zip(range(3), stream):
+                if "event: status" in message:
+                    break
+            else:
+                self.fail("No status event streamed")
+            stream.close()
+        counts.assert_called()
+
+    def test_status_recounts_are_throttled(self):
+        """Test that statuses are recounted at most once per interval, and only after changes"""
+        feed = WorkflowChangeFeed(poll_interval=1, status_interval=60)
+        changes = [self.change("wf-0", 1000)]
+        with mock.patch.object(
+            workflow_queries, "list_workflow_changes", side_effect=lambda **_: changes
+        ), mock.patch.object(
+            workflow_queries, "count_workflows_by_status", return_value=({}, 0)
+        ) as counts:
+            for _ in range(3):
+                feed._poll((0, ""))
+            self.assertEqual(counts.call_count, 1)
+
+            # The changes since the last count are counted once the interval is up
+            changes = []
+            feed._status_due = 0.0
+            feed._poll((1000, "wf-0"))
+            feed._status_due = 0.0
+            feed._poll((1000, "wf-0"))
+            self.assertEqual(counts.call_count, 2)
+
+
+@skipUnless(
+    sqlite3.sqlite_version_info >= (3, 42),
+    "DBOS's SQLite system database needs SQLite 3.42 or later",
+)
+class DBOSTestCase(SimpleTestCase):
+    """Runs DBOS on a throwaway SQLite system database, emptied before each test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.system_dir = tempfile.TemporaryDirectory()
+        DBOS(
+            config={
+                "name": "core-tests",
+                "system_database_url": f"sqlite:///{cls.system_dir.name}/dbos.sqlite",
+            }
+        )
+        DBOS.launch()
+
+    @classmethod
+    def tearDownClass(cls):
+        DBOS.destroy()
+        cls.system_dir.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        with workflow_queries.get_engine().begin() as conn:
+            for table, _ in workflow_queries._workflow_children():
+                conn.execute(sa.delete(table))
+            conn.execute(sa.delete(workflow_queries.workflow_status))
+
+    def api(self, method, path, data=None, **extra):
+        """Call a ``/api/v1/tasks`` endpoint, authenticated with an API key."""
+        with override_settings(X_API_KEY="test-key"):
+            return getattr(self.client, method)(
+                f"/api/v1/tasks{path}", data, HTTP_X_API_KEY="test-key", **extra
+            )
+
+    def update_workflows(self, workflow_ids, **values):
+        """Overwrite ``workflow_status`` columns, e.g. to backdate workflows."""
+        ws = workflow_queries.workflow_status
+        with workflow_queries.get_engine().begin() as conn:
+            conn.execute(
+                sa.update(ws)
+                .where(ws.c.workflow_uuid.in_(workflow_ids))
+                .values(**values)
+            )
+
+
+class WorkflowOutcomeTests(DBOSTestCase):
+    def test_outputs_and_errors_are_decoded(self):
+        """Test that bulk outcomes carry deserialised outputs and error messages"""
+        succeeded = DBOS.start_workflow(echo_workflow, {"n": 1})
+        succeeded.get_result()
+        failed = DBOS.start_workflow(echo_workflow, "x", fail=True)
+        with self.assertRaises(ValueError):
+            failed.get_result()
+
+        rows = workflow_queries.get_workflow_outcomes(
+            [succeeded.workflow_id, failed.workflow_id, succeeded.workflow_id, "missing"]
+        )
+        outcomes = {row["workflow_uuid"]: row for row in rows}
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(outcomes[succeeded.workflow_id]["status"], "SUCCESS")
+        self.assertEqual(outcomes[succeeded.workflow_id]["output"], {"echo": {"n": 1}})
+        self.assertIsNone(outcomes[succeeded.workflow_id]["error"])
+        self.assertEqual(outcomes[failed.workflow_id]["status"], "ERROR")
+        self.assertEqual(outcomes[failed.workflow_id]["error"], "failed on x")
+        self.assertIsNone(outcomes[failed.workflow_id]["output"])
+
+    def test_only_terminal_across_chunks(self):
+        """Test that unfinished workflows are skipped when asked, with IDs split into chunks"""
+        finished = [DBOS.start_workflow(echo_workflow, i) for i in range(3)]
+        for handle in finished:
+            handle.get_result()
+        waiting = DBOS.start_workflow(waiting_workflow)
+        workflow_ids = [handle.workflow_id for handle in finished] + [waiting.workflow_id]
+
+        with mock.patch.object(workflow_queries, "ID_CHUNK_SIZE", 2):
+            everything = workflow_queries.get_workflow_outcomes(workflow_ids)
+            terminal = workflow_queries.get_workflow_outcomes(
+                workflow_ids, only_terminal=True
+            )
+        DBOS.send(waiting.workflow_id, "done", "go")
+        waiting.get_result()
+
+        self.assertEqual(len(everything), 4)
+        self.assertEqual(
+            {row["workflow_uuid"] for row in terminal},
+            {handle.workflow_id for handle in finished},
+        )
+        self.assertEqual(sorted(row["output"]["echo"] for row in terminal), [0, 1, 2])
+
+
+class WorkflowPageTests(DBOSTestCase):
+    def test_filters_and_cursor_pages(self):
+        """Test that pages are filtered in the database and the cursor walks them newest first"""
+        for i in range(5):
+            with SetWorkflowID(f"page-{i}"):
+                DBOS.start_workflow(echo_workflow, i).get_result()
+        with SetWorkflowID("page-failed"):
+            failed = DBOS.start_workflow(echo_workflow, "x", fail=True)
+        with self.assertRaises(ValueError):
+            failed.get_result()
+        with SetWorkflowID("other-0"):
+            DBOS.start_workflow(steps_workflow, [1]).get_result()
+        base = workflow_queries.to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc))
+        # page-2 and page-3 share a creation time, so the cursor falls on a tie
+        for i, offset in enumerate([0, 1000, 2000, 2000, 3000]):
+            self.update_workflows([f"page-{i}"], created_at=base + offset)
+
+        pages, cursor = [], None
+        while True:
+            rows, cursor = workflow_queries.list_workflow_page(
+                limit=2,
+                cursor=cursor,
+                status=["SUCCESS"],
+                name=echo_workflow.__qualname__,
+                workflow_id_prefix="page-",
+            )
+            pages.append([row["workflow_uuid"] for row in rows])
+            if cursor is None:
+                break
+        self.assertEqual(pages, [["page-4", "page-3"], ["page-2", "page-1"], ["page-0"]])
+
+        window, _ = workflow_queries.list_workflow_page(
+            limit=10,
+            start_time=workflow_queries.from_epoch_ms(base + 1000),
+            end_time=workflow_queries.from_epoch_ms(base + 3000),
+        )
+        self.assertEqual(
+            [row["workflow_uuid"] for row in window], ["page-3", "page-2", "page-1"]
+        )
+        others, _ = workflow_queries.list_workflow_page(
+            limit=10, name=steps_workflow.__qualname__
+        )
+        self.assertEqual([row["workflow_uuid"] for row in others], ["other-0"])
+        failures, _ = workflow_queries.list_workflow_page(limit=10, status=["ERROR"])
+        self.assertEqual([row["workflow_uuid"] for row in failures], ["page-failed"])
+
+
+class WorkflowExportEndpointTests(DBOSTestCase):
+    def export(self, **params):
+        response = self.api("get", "/export", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_export_streams_filtered_ndjson_and_gzip(self):
+        """Test that /export streams the matching workflows oldest first, plain or gzipped"""
+        for i in range(3):
+            with SetWorkflowID(f"export-{i}"):
+                DBOS.start_workflow(echo_workflow, i).get_result()
+        with SetWorkflowID("export-failed"):
+            failed = DBOS.start_workflow(echo_workflow, "x", fail=True)
+        with self.assertRaises(ValueError):
+            failed.get_result()
+        with SetWorkflowID("export-steps"):
+            DBOS.start_workflow(steps_workflow, [1]).get_result()
+        base = workflow_queries.to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc))
+        for i in range(3):
+            self.update_workflows([f"export-{i}"], created_at=base + i * 1000)
+
+        response, body = self.export(
+            status="SUCCESS",
+            name=echo_workflow.__qualname__,
+            start_time="2025-01-01T00:00:01Z",
+        )
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="workflows.ndjson"', response["Content-Disposition"])
+        records = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [record["workflow_id"] for record in records], ["export-1", "export-2"]
+        )
+        self.assertEqual(records[0]["status"], "SUCCESS")
+
+        response, body = self.export(gzip="true", status="ERROR")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(
+            'filename="workflows.ndjson.gz"', response["Content-Disposition"]
+        )
+        records = [json.loads(line) for line in gzip.decompress(body).splitlines()]
+        self.assertEqual(
+            [record["workflow_id"] for record in records], ["export-failed"]
+        )
+
+        _, body = self.export(gzip="true")
+        self.assertEqual(len(gzip.decompress(body).splitlines()), 5)
+
+
+class WorkflowChangeTests(DBOSTestCase):
+    def test_changes_are_bounded_and_settled(self):
+        """Test that changes to old workflows and changes too recent to be settled are left out"""
+        handles = [DBOS.start_workflow(echo_workflow, i) for i in range(3)]
+        for handle in handles:
+            handle.get_result()
+        old, settled, recent = (handle.workflow_id for handle in handles)
+        now = datetime.now(timezone.utc)
+        earlier = workflow_queries.to_epoch_ms(now - timedelta(minutes=2))
+        self.update_workflows(
+            [old],
+            created_at=workflow_queries.to_epoch_ms(now - timedelta(days=2)),
+            updated_at=earlier,
+        )
+        self.update_workflows([settled], updated_at=earlier)
+
+        everything = workflow_queries.list_workflow_changes(after=(0, ""), limit=10)
+        bounded = workflow_queries.list_workflow_changes(
+            after=(0, ""),
+            limit=10,
+            created_after=now - timedelta(hours=1),
+            settle_ms=60_000,
+        )
+        self.assertEqual(
+            {row["workflow_uuid"] for row in everything}, {old, settled, recent}
+        )
+        self.assertEqual([row["workflow_uuid"] for row in bounded], [settled])
+
+
+class WorkflowCountTests(DBOSTestCase):
+    def test_counts_by_status_and_queued(self):
+        """Test that workflows are counted per status, with queued ones counted separately"""
+        finished = [DBOS.start_workflow(echo_workflow, i) for i in range(2)]
+        for handle in finished:
+            handle.get_result()
+        failed = DBOS.start_workflow(echo_workflow, "x", fail=True)
+        with self.assertRaises(ValueError):
+            failed.get_result()
+        running = DBOS.start_workflow(waiting_workflow, 5)
+        enqueued = DBOS.start_workflow(waiting_workflow, 5)
+        self.update_workflows([running.workflow_id], queue_name="bulk")
+        self.update_workflows(
+            [enqueued.workflow_id], queue_name="bulk", status="ENQUEUED"
+        )
+        old = workflow_queries.to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.update_workflows([finished[0].workflow_id], created_at=old)
+
+        counts, queued = workflow_queries.count_workflows_by_status()
+        since = workflow_queries.count_workflows_by_status(
+            start_time=datetime(2025, 1, 2, tzinfo=timezone.utc)
+        )
+        until = workflow_queries.count_workflows_by_status(
+            end_time=datetime(2025, 1, 2, tzinfo=timezone.utc)
+        )
+        DBOS.send(running.workflow_id, "done", "go")
+        running.get_result()
+        workflow_queries.cancel_workflow_ids([enqueued.workflow_id])
+
+        others = {"ERROR": 1, "PENDING": 1, "ENQUEUED": 1}
+        self.assertEqual(counts, {"SUCCESS": 2, **others})
+        self.assertEqual(queued, 2)
+        self.assertEqual(since, ({"SUCCESS": 1, **others}, 2))
+        self.assertEqual(until, ({"SUCCESS": 1}, 0))
+
+    def test_status_endpoint_defaults_to_a_window(self):
+        """Test that /status only counts recent workflows unless given a start time"""
+        handles = [DBOS.start_workflow(echo_workflow, i) for i in range(2)]
+        for handle in handles:
+            handle.get_result()
+        old = workflow_queries.to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.update_workflows([handles[0].workflow_id], created_at=old)
+
+        recent = self.api("get", "/status").json()
+        everything = self.api("get", "/status", {"start_time": "2024-12-31T00:00:00Z"})
+        self.assertEqual((recent["total_workflows"], recent["success"]), (1, 1))
+        self.assertEqual(everything.json()["total_workflows"], 2)
+
+
+class BulkEnqueueTests(DBOSTestCase):
+    def enqueue(self, args_list, workflow_ids=None):
+        # Run as an async view does under WSGI, on a short-lived event loop
+        @dbos_async_view
+        async def view(request):
+            return await enqueue_bulk_async(
+                echo_workflow, args_list, workflow_ids=workflow_ids
+            )
+
+        return async_to_sync(view)(RequestFactory().post("/"))
+
+    def test_batch_is_enqueued_by_one_workflow(self):
+        """Test that a batch is enqueued by one workflow and resubmitting it adds nothing"""
+        workflow_ids = self.enqueue([[1], [2], [3]])
+        batch_id = f"{workflow_ids[0]}-batch"
+        self.assertEqual(DBOS.retrieve_workflow(batch_id).get_result(), 3)
+        results = [DBOS.retrieve_workflow(i).get_result() for i in workflow_ids]
+        self.assertEqual(results, [{"echo": 1}, {"echo": 2}, {"echo": 3}])
+        statuses = DBOS.list_workflows(workflow_ids=workflow_ids, load_input=False)
+        self.assertEqual({s.queue_name for s in statuses}, {"bulk"})
+
+        self.assertEqual(self.enqueue([[1], [2], [3]], workflow_ids), workflow_ids)
+        self.assertEqual(len(DBOS.list_workflows(load_input=False)), 4)
+
+    def test_single_workflow_is_enqueued_directly(self):
+        """Test that a single workflow is enqueued without a batch workflow"""
+        (workflow_id,) = self.enqueue([[7]])
+        self.assertEqual(DBOS.retrieve_workflow(workflow_id).get_result(), {"echo": 7})
+        self.assertEqual(
+            [s.workflow_id for s in DBOS.list_workflows(load_input=False)],
+            [workflow_id],
+        )
+
+
+class QueueTests(DBOSTestCase):
+    def test_aggregation_queue_follows_settings(self):
+        """Test that the aggregation queue takes its caps and rate limiter from settings"""
+        options = settings.DBOS_QUEUES["aggregation"]
+        self.assertIs(QUEUES["aggregation"], aggregation_queue)
+        self.assertEqual(aggregation_queue.concurrency, options["concurrency"])
+        self.assertEqual(
+            aggregation_queue.worker_concurrency, options["worker_concurrency"]
+        )
+        self.assertEqual(aggregation_queue.limiter, options["limiter"])
+        self.assertIsNone(QUEUES["bulk"].limiter)
+
+    def test_queue_stats(self):
+        """Test that depth and starts within the limiter period are counted per queue"""
+        handles = [DBOS.start_workflow(echo_workflow, i) for i in range(6)]
+        for handle in handles:
+            handle.get_result()
+        ids = [handle.workflow_id for handle in handles]
+        now = workflow_queries.to_epoch_ms(datetime.now(timezone.utc))
+        hour_ago = now - 3_600_000
+        self.update_workflows(ids[:5], queue_name="aggregation")
+        self.update_workflows(ids[:2], status="ENQUEUED", created_at=hour_ago)
+        self.update_workflows(ids[1:2], created_at=hour_ago + 1000)
+        self.update_workflows(ids[2:3], status="PENDING", started_at_epoch_ms=now)
+        self.update_workflows(ids[3:4], started_at_epoch_ms=now)
+        self.update_workflows(ids[4:5], started_at_epoch_ms=hour_ago)
+        self.update_workflows(ids[5:], queue_name="bulk", started_at_epoch_ms=now)
+
+        stats = workflow_queries.queue_stats({"aggregation": 60.0, "bulk": None})
+
+        self.assertEqual(
+            stats["aggregation"],
+            {
+                "enqueued": 2,
+                "running": 1,
+                "oldest_enqueued_at": hour_ago,
+                "started_in_period": 2,
+            },
+        )
+        # No limiter, so starts are not counted
+        self.assertEqual(stats["bulk"]["started_in_period"], 0)
+        self.assertEqual(stats["bulk"]["enqueued"], 0)
+
+
+class WorkflowMetricsTests(DBOSTestCase):
+    def test_nearest_rank_percentiles(self):
+        """Test that percentiles are nearest-rank over finished workflows in the window"""
+        handles = [
+            DBOS.start_workflow(echo_workflow, i, fail=i == 9) for i in range(11)
+        ]
+        for handle in handles[:9]:
+            handle.get_result()
+        with self.assertRaises(ValueError):
+            handles[9].get_result()
+        handles[10].get_result()
+        waiting = DBOS.start_workflow(waiting_workflow, 5)
+        name = DBOS.get_workflow_status(handles[0].workflow_id).name
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        base = workflow_queries.to_epoch_ms(start)
+
+        # Execution takes 100ms to 1000ms; the first four queued for 10ms to 40ms
+        for i, handle in enumerate(handles[:10]):
+            started = base + (i + 1) * 10 if i < 4 else None
+            self.update_workflows(
+                [handle.workflow_id],
+                created_at=base,
+                started_at_epoch_ms=started,
+                updated_at=(started or base) + (i + 1) * 100,
+            )
+        # Outside the window, and not finished
+        self.update_workflows([handles[10].workflow_id], created_at=base - 1000)
+        self.update_workflows([waiting.workflow_id], name=name, created_at=base)
+
+        window = {"start_time": start, "end_time": start + timedelta(hours=1)}
+        metrics = workflow_queries.workflow_metrics(**window)
+        filtered = workflow_queries.workflow_metrics(name="other_workflow", **window)
+        workflow_queries.cancel_workflow_ids([waiting.workflow_id])
+
+        self.assertEqual(
+            metrics,
+            [
+                {
+                    "name": name,
+                    "completed": 10,
+                    "errors": 1,
+                    "wait_p50": 20,
+                    "exec_p50": 500,
+                    "wait_p95": 40,
+                    "exec_p95": 1000,
+                    "wait_p99": 40,
+                    "exec_p99": 1000,
+                }
+            ],
+        )
+        self.assertEqual(filtered, [])
+
+
+class WorkflowStepTests(DBOSTestCase):
+    def setUp(self):
+        super().setUp()
+        handle = DBOS.start_workflow(steps_workflow, [10, 5000])
+        handle.get_result()
+        self.workflow_id = handle.workflow_id
+
+    def test_outputs_over_max_output_size_are_left_out(self):
+        """Test that large step outputs are reported by size only, small ones decoded"""
+        small, large, failed = workflow_queries.list_workflow_steps(
+            self.workflow_id, max_output_size=1000
+        )
+        self.assertEqual(small["output"], "x" * 10)
+        self.assertFalse(small["output_truncated"])
+        self.assertIsNone(large["output"])
+        self.assertTrue(large["output_truncated"])
+        self.assertGreater(large["output_size"], 5000)
+        self.assertIsNotNone(large["completed_at_epoch_ms"])
+        self.assertIsInstance(failed["error"], ValueError)
+        self.assertFalse(failed["output_truncated"])
+
+    def test_get_step_output(self):
+        """Test that a single step is fetched with its full output"""
+        steps = workflow_queries.list_workflow_steps(self.workflow_id, max_output_size=0)
+        self.assertTrue(all(step["output"] is None for step in steps))
+
+        step = workflow_queries.get_step_output(self.workflow_id, steps[1]["function_id"])
+        self.assertEqual(step["output"], "x" * 5000)
+        self.assertEqual(step["function_name"], steps[1]["function_name"])
+        self.assertNotIn("serialization", step)
+        self.assertIsNone(workflow_queries.get_step_output(self.workflow_id, 999))
+
+
+class BulkCancelTests(DBOSTestCase):
+    def setUp(self):
+        super().setUp()
+        self.finished = DBOS.start_workflow(echo_workflow, 1)
+        self.finished.get_result()
+        self.waiting = [DBOS.start_workflow(waiting_workflow, 5) for _ in range(3)]
+        self.name = DBOS.get_workflow_status(self.waiting[0].workflow_id).name
+
+    def statuses(self):
+        return {
+            handle.workflow_id: DBOS.get_workflow_status(handle.workflow_id).status
+            for handle in [self.finished, *self.waiting]
+        }
+
+    def test_cancel_ids_skips_finished_workflows(self):
+        """Test that only cancellable workflows among the given IDs are cancelled"""
+        cancelled = workflow_queries.cancel_workflow_ids(
+            [self.finished.workflow_id, self.waiting[0].workflow_id, "missing"]
+        )
+        self.assertEqual(cancelled, 1)
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.finished.workflow_id], "SUCCESS")
+        self.assertEqual(statuses[self.waiting[0].workflow_id], "CANCELLED")
+        self.assertEqual(statuses[self.waiting[1].workflow_id], "PENDING")
+        workflow_queries.cancel_workflow_ids([h.workflow_id for h in self.waiting])
+
+    def test_matching_is_chunked_and_filtered(self):
+        """Test that matching walks filtered workflows in chunks and skips the excluded one"""
+        first = workflow_queries.cancel_next_matching(
+            limit=2, name=self.name, exclude=self.waiting[2].workflow_id
+        )
+        self.assertEqual(first[:2], (2, 2))
+        second = workflow_queries.cancel_next_matching(
+            limit=2, after=first[2], name=self.name, exclude=self.waiting[2].workflow_id
+        )
+        self.assertEqual(second, (0, 0, None))
+        self.assertEqual(
+            workflow_queries.cancel_next_matching(limit=2, name="other_workflow"),
+            (0, 0, None),
+        )
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.waiting[2].workflow_id], "PENDING")
+        self.assertEqual(
+            [statuses[h.workflow_id] for h in self.waiting[:2]], ["CANCELLED"] * 2
+        )
+        workflow_queries.cancel_workflow_ids([self.waiting[2].workflow_id])
+
+    def test_progress_event(self):
+        """Test that a bulk cancel publishes its final progress as a DBOS event"""
+        with mock.patch.object(bulk_cancel, "CANCEL_CHUNK_SIZE", 2):
+            handle = DBOS.start_workflow(
+                bulk_cancel.bulk_cancel_workflows, None, {"name": self.name}
+            )
+            progress = handle.get_result()
+        expected = {"matched": 3, "cancelled": 3, "chunks": 2, "done": True}
+        self.assertEqual(progress, expected)
+        self.assertEqual(
+            DBOS.get_event(handle.workflow_id, bulk_cancel.PROGRESS_EVENT), expected
+        )
+        self.assertEqual(
+            sorted(self.statuses().values()), ["CANCELLED"] * 3 + ["SUCCESS"]
+        )
+
+    def test_endpoint_rejects_ambiguous_requests(self):
+        """Test that /cancel refuses too many IDs or IDs with filters rather than dropping any"""
+        workflow_ids = [handle.workflow_id for handle in self.waiting]
+        for payload in (
+            {},
+            {"workflow_ids": workflow_ids, "name": self.name},
+            {"workflow_ids": ["missing"] * (MAX_BULK_COUNT + 1)},
+        ):
+            response = self.api(
+                "post", "/cancel", payload, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertNotIn("CANCELLED", self.statuses().values())
+
+        response = self.api(
+            "post",
+            "/cancel",
+            {"workflow_ids": workflow_ids},
+            content_type="application/json",
+        )
+        progress = DBOS.retrieve_workflow(response.json()["job_id"]).get_result()
+        self.assertEqual(progress["cancelled"], 3)
+
+
+class RetentionTests(SimpleTestCase):
+    @override_settings(
+        WORKFLOW_RETENTION_DAYS={"SUCCESS": 7},
+        WORKFLOW_RETENTION_DAYS_BY_NAME={"noisy_job": 1},
+    )
+    def test_name_periods_override_status_periods(self):
+        """Test that per-name retention covers all finished statuses and is excluded from status rules"""
+        now = datetime(2025, 1, 8, tzinfo=timezone.utc)
+        by_name, by_status = retention_rules(now)
+        self.assertEqual(by_name["name"], "noisy_job")
+        self.assertEqual(set(by_name["status"]), set(workflow_queries.TERMINAL_STATUSES))
+        self.assertEqual(
+            by_name["created_before"],
+            workflow_queries.to_epoch_ms(datetime(2025, 1, 7, tzinfo=timezone.utc)),
+        )
+        self.assertEqual(by_status["status"], ["SUCCESS"])
+        self.assertEqual(by_status["exclude_names"], ["noisy_job"])
+        self.assertEqual(
+            by_status["created_before"],
+            workflow_queries.to_epoch_ms(datetime(2025, 1, 1, tzinfo=timezone.utc)),
+        )
+
+
+class RetentionPruneTests(DBOSTestCase):
+    def step_count(self, workflow_id):
+        oo = workflow_queries.operation_outputs
+        with workflow_queries.get_engine().connect() as conn:
+            return conn.execute(
+                sa.select(sa.func.count()).where(oo.c.workflow_uuid == workflow_id)
+            ).scalar_one()
+
+    @override_settings(
+        WORKFLOW_RETENTION_DAYS={"SUCCESS": 7, "ERROR": 30},
+        WORKFLOW_RETENTION_DAYS_BY_NAME={},
+    )
+    def test_cleanup_deletes_only_expired_terminal_workflows(self):
+        """Test that the daily cleanup deletes expired finished workflows and their steps only"""
+        for workflow_id in ("expired", "recent"):
+            with SetWorkflowID(workflow_id):
+                DBOS.start_workflow(steps_workflow, [10]).get_result()
+        with SetWorkflowID("failed"):
+            failed = DBOS.start_workflow(echo_workflow, "x", fail=True)
+        with self.assertRaises(ValueError):
+            failed.get_result()
+        with SetWorkflowID("running"):
+            running = DBOS.start_workflow(waiting_workflow)
+        now = datetime.now(timezone.utc)
+        for workflow_id, age in (("expired", 10), ("failed", 10), ("running", 100)):
+            self.update_workflows(
+                [workflow_id],
+                created_at=workflow_queries.to_epoch_ms(now - timedelta(days=age)),
+            )
+        self.assertGreater(self.step_count("expired"), 0)
+
+        with SetWorkflowID("cleanup"):
+            result = DBOS.start_workflow(daily_cleanup, now, now).get_result()
+        DBOS.send(running.workflow_id, "done", "go")
+        running.get_result()
+
+        self.assertEqual(result["rows_deleted"], 1)
+        self.assertGreater(result["bytes_reclaimed"], 0)
+        rows, _ = workflow_queries.list_workflow_page(limit=10)
+        self.assertEqual(
+            {row["workflow_uuid"] for row in rows},
+            {"recent", "failed", "running", "cleanup"},
+        )
+        self.assertEqual(self.step_count("expired"), 0)
+        self.assertGreater(self.step_count("recent"), 0)
+
+
+class IdempotencyTests(SimpleTestCase):
+    def test_workflow_id_is_deterministic_per_scope_and_caller(self):
+        """Test that the same key maps to the same workflow ID only within a scope and caller"""
+        request = RequestFactory().post("/", HTTP_IDEMPOTENCY_KEY="retry-1")
+        key = get_idempotency_key(request, "ignored-field")
+        self.assertEqual(key, "retry-1")
+
+        workflow_id = idempotent_workflow_id(request, "test", key)
+        self.assertEqual(workflow_id, idempotent_workflow_id(request, "test", key))
+        self.assertNotEqual(workflow_id, idempotent_workflow_id(request, "aggregate", key))
+        request.auth = User(pk=7)
+        self.assertNotEqual(workflow_id, idempotent_workflow_id(request, "test", key))
+
+
+class IdempotentSubmitTests(DBOSTestCase):
+    def workflow_ids(self, prefix):
+        rows, _ = workflow_queries.list_workflow_page(
+            limit=100, workflow_id_prefix=prefix
+        )
+        return sorted(row["workflow_uuid"] for row in rows)
+
+    def test_resubmitting_test_jobs_returns_the_same_batch(self):
+        """Test that /test with a repeated Idempotency-Key returns the first batch and queues no more"""
+        first, second = (
+            self.api("post", "/test?count=3", HTTP_IDEMPOTENCY_KEY="batch-1").json()
+            for _ in range(2)
+        )
+        base = first["workflow_ids"][0].rpartition("-")[0]
+        # The jobs are enqueued by one batch workflow; wait until they all exist
+        DBOS.retrieve_workflow(f"{base}-0-batch").get_result()
+        workflow_ids = self.workflow_ids("test-")
+        workflow_queries.cancel_workflow_ids(first["workflow_ids"])
+
+        self.assertEqual(first["workflow_ids"], second["workflow_ids"])
+        self.assertEqual(first["workflow_ids"], [f"{base}-{i}" for i in range(3)])
+        self.assertEqual(
+            workflow_ids, sorted(first["workflow_ids"] + [f"{base}-0-batch"])
+        )
+
+    def test_resubmitting_an_aggregation_returns_the_same_workflow(self):
+        """Test that /aggregate with a repeated Idempotency-Key returns the first workflow"""
+        first, second = (
+            self.api("post", "/aggregate", HTTP_IDEMPOTENCY_KEY="agg-1").json()
+            for _ in range(2)
+        )
+        workflow_queries.cancel_workflow_ids([first["workflow_id"]])
+
+        self.assertEqual(first["workflow_id"], second["workflow_id"])
+        self.assertTrue(first["workflow_id"].startswith("aggregate-"))
+        self.assertEqual(self.workflow_ids("aggregate-"), [first["workflow_id"]])
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "valkey": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "await-result-tests",
+        },
+    }
+)
+class AwaitResultTests(DBOSTestCase):
+    def test_returns_once_the_feed_sees_completion(self):
+        """Test that /result/await returns as soon as the change feed reports the workflow done"""
+        handle = DBOS.start_workflow(waiting_workflow)
+        timer = threading.Timer(0.5, DBOS.send, (handle.workflow_id, "done", "go"))
+        timer.start()
+        started = time.monotonic()
+        response = self.api(
+            "get", "/result/await", {"workflow_id": handle.workflow_id, "wait": 30}
+        )
+        timer.join()
+
+        self.assertEqual(response.json()["status"], "SUCCESS")
+        self.assertEqual(response.json()["result"], "done")
+        self.assertLess(time.monotonic() - started, 15)
+
+    def test_returns_current_status_after_timeout(self):
+        """Test that /result/await gives up after ``wait`` seconds with the current status"""
+        handle = DBOS.start_workflow(waiting_workflow)
+        started = time.monotonic()
+        response = self.api(
+            "get", "/result/await", {"workflow_id": handle.workflow_id, "wait": 0.2}
+        )
+        elapsed = time.monotonic() - started
+        DBOS.send(handle.workflow_id, "done", "go")
+        handle.get_result()
+
+        self.assertEqual(response.json()["status"], "PENDING")
+        self.assertIsNone(response.json()["result"])
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 5)
+
+
+class AsyncViewTests(SimpleTestCase):
+    def test_dbos_async_view_keeps_shared_executor_alive(self):
+        """Test that a per-request event loop does not shut down a shared executor"""
+        shared = ThreadPoolExecutor(max_workers=1)
+
+        @dbos_async_view
+        async def view(request):
+            # What DBOS does before each async API call
+            asyncio.get_running_loop().set_default_executor(shared)
+            return await asyncio.to_thread(lambda: "ok")
+
+        request = RequestFactory().get("/")
+        self.assertEqual(async_to_sync(view)(request), "ok")
+        self.assertEqual(shared.submit(lambda: "still running").result(), "still running")
+        shared.shutdown()
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "workflow-cache-tests",
+        },
+    }
+)
+class WorkflowCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TerminalWorkflowCache(max_entries=2, timeout=60, alias="shared")
+        caches["shared"].clear()
+
+    def test_skips_non_terminal_workflows(self):
+        """Test that running workflows are never cached"""
+        self.assertFalse(self.cache.set("result", "wf-1", "PENDING", {"x": 1}))
+        self.assertIsNone(self.cache.get("result", "wf-1"))
+        self.assertTrue(self.cache.set("result", "wf-1", "SUCCESS", {"x": 1}))
+        self.assertEqual(self.cache.get("result", "wf-1"), {"x": 1})
+
+    def test_local_tier_is_bounded(self):
+        """Test that the in-process LRU evicts beyond max_entries and refills from the shared tier"""
+        for workflow_id in ("wf-1", "wf-2", "wf-3"):
+            self.cache.set("result", workflow_id, "SUCCESS", workflow_id)
+        self.assertEqual(len(self.cache._local), 2)
+        self.assertNotIn("workflow:result:wf-1", self.cache._local)
+        self.assertEqual(self.cache.get("result", "wf-1"), "wf-1")
+        self.assertIn("workflow:result:wf-1", self.cache._local)
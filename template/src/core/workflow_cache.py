@@ -0,0 +1,115 @@
+"""
+Cache for the results and details of finished workflows.
+
+Once a workflow reaches a terminal status its output, error and steps no
+longer change, so they can be served without going back to the DBOS system
+database. Entries are kept in a small in-process LRU in front of the shared
+``valkey`` cache, so repeated views are answered from memory and other
+processes still benefit from the first lookup.
+
+Entries are never invalidated, only evicted or expired: nothing here resumes
+a terminal workflow, and a workflow deleted by retention can still be served
+from the cache until its entries expire (``WORKFLOW_CACHE_TIMEOUT``).
+"""
+
+import asyncio
+import collections
+import threading
+from typing import Any, Optional
+
+import structlog
+from django.conf import settings
+from django.core.cache import caches
+
+from core.workflow_queries import TERMINAL_STATUSES
+
+logger = structlog.get_logger(__name__)
+
+# Returned by the LRU when a key is absent, since ``None`` may be a cached value
+_MISSING = object()
+
+
+class TerminalWorkflowCache:
+    """
+    Two-tier cache keyed by (kind, workflow ID) that only accepts terminal workflows.
+
+    ``kind`` distinguishes the representations cached per workflow, e.g.
+    ``"result"`` or ``"details"``. The in-process tier evicts the least
+    recently used entry beyond ``max_entries``; the valkey tier expires
+    entries after ``timeout`` seconds and is bounded by the server's own
+    eviction policy.
+    """
+
+    def __init__(self, max_entries: int, timeout: int, alias: str = "valkey"):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.alias = alias
+        self._local: "collections.OrderedDict[str, Any]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, workflow_id: str) -> str:
+        return f"workflow:{kind}:{workflow_id}"
+
+    def _remember(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._local[key] = value
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _get_local(self, key: str) -> Any:
+        with self._lock:
+            value = self._local.get(key, _MISSING)
+            if value is not _MISSING:
+                self._local.move_to_end(key)
+            return value
+
+    def get(self, kind: str, workflow_id: str) -> Optional[Any]:
+        """Return the cached value, or ``None`` if it is not cached."""
+        key = self._key(kind, workflow_id)
+        value = self._get_local(key)
+        if value is not _MISSING:
+            return value
+        value = caches[self.alias].get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def set(self, kind: str, workflow_id: str, status: Optional[str], value: Any) -> bool:
+        """
+        Cache ``value`` if ``status`` is terminal.
+
+        Returns:
+            Whether the value was cached.
+        """
+        if status not in TERMINAL_STATUSES or value is None:
+            return False
+        key = self._key(kind, workflow_id)
+        self._remember(key, value)
+        try:
+            caches[self.alias].set(key, value, timeout=self.timeout)
+        except Exception as e:
+            # The in-process tier still holds the value
+            logger.warning("workflow_cache_set_failed", key=key, error=str(e))
+        return True
+
+    async def aget(self, kind: str, workflow_id: str) -> Optional[Any]:
+        # Answer in-process hits without leaving the event loop
+        value = self._get_local(self._key(kind, workflow_id))
+        if value is not _MISSING:
+            return value
+        return await asyncio.to_thread(self.get, kind, workflow_id)
+
+    async def aset(
+        self, kind: str, workflow_id: str, status: Optional[str], value: Any
+    ) -> bool:
+        if status not in TERMINAL_STATUSES:
+            return False
+        return await asyncio.to_thread(self.set, kind, workflow_id, status, value)
+
+
+workflow_cache = TerminalWorkflowCache(
+    max_entries=getattr(settings, "WORKFLOW_CACHE_MAX_ENTRIES", 1024),
+    timeout=getattr(settings, "WORKFLOW_CACHE_TIMEOUT", 60 * 60 * 24 * 7),
+)
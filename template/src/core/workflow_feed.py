@@ -0,0 +1,433 @@
+"""
+Process-wide feed of workflow state changes for Server-Sent Events.
+
+Every open task monitor used to poll the status and list endpoints on its own
+timer. Instead, a single background thread per process follows the DBOS
+``workflow_status`` table with one keyset query per interval and fans the
+changes out to all connected SSE clients, so database load no longer grows
+with the number of open tabs.
+
+The query only scans workflows created within the feed's ``window``, through
+the ``created_at`` index (``updated_at`` has none), so changes to older
+workflows are not streamed. It leaves out changes stamped in the last
+``CHANGE_SETTLE_MS``, so one whose transaction commits late is not skipped
+past. The status counts cover the workflows created within ``status_window``
+and are refreshed at most every ``status_interval`` seconds, however fast
+workflows change.
+"""
+
+import asyncio
+import collections
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+import structlog
+from django.conf import settings
+
+from core import workflow_queries
+
+logger = structlog.get_logger(__name__)
+
+Position = Tuple[int, str]
+Events = List[Tuple[Position, Dict[str, Any]]]
+# An async subscriber: the event loop it runs on and the event that wakes it
+Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+
+# Maximum rows fetched per poll, and per catch-up query when a client resumes
+CHANGE_BATCH_SIZE = 500
+# Number of recent events kept in memory so reconnecting clients can resume cheaply
+BACKLOG_SIZE = 2000
+# Seconds between keep-alive comments when nothing changes
+HEARTBEAT_SECONDS = 15
+# Changes stamped less than this many milliseconds ago are left for the next poll:
+# DBOS stamps a change when its transaction starts, not when it commits
+CHANGE_SETTLE_MS = 2000
+
+
+def _workflow_event(row: Dict[str, Any]) -> Dict[str, Any]:
+    created_at = workflow_queries.from_epoch_ms(row["created_at"])
+    updated_at = workflow_queries.from_epoch_ms(row["updated_at"])
+    return {
+        "workflow_id": row["workflow_uuid"],
+        "name": row["name"],
+        "status": row["status"],
+        "created_at": created_at.isoformat() if created_at else None,
+        "updated_at": updated_at.isoformat() if updated_at else None,
+        "app_version": row["application_version"],
+    }
+
+
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    """Format a single Server-Sent Events message."""
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class WorkflowChangeFeed:
+    """
+    Follows workflow state changes on behalf of every subscriber in the process.
+
+    The polling thread only runs while at least one client is subscribed.
+    Recent changes are kept in a bounded backlog; a client whose position has
+    fallen out of the backlog catches up with a direct query instead.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float,
+        window: timedelta = timedelta(hours=24),
+        status_interval: float = 5.0,
+        status_window: timedelta = timedelta(hours=24),
+    ):
+        self.poll_interval = poll_interval
+        self.window = window
+        self.status_interval = status_interval
+        self.status_window = status_window
+        self._condition = threading.Condition()
+        self._backlog: Deque[Tuple[Position, Dict[str, Any]]] = collections.deque(
+            maxlen=BACKLOG_SIZE
+        )
+        self._position: Optional[Position] = None
+        # Everything after this position is either in the backlog or not yet polled
+        self._floor: Optional[Position] = None
+        self._status: Optional[Dict[str, Any]] = None
+        self._status_version = 0
+        # Whether workflows changed since the last count, and when to count again
+        self._status_stale = False
+        self._status_due = 0.0
+        self._subscribers = 0
+        # Subscribers that want the aggregate counts, not just workflow changes
+        self._status_subscribers = 0
+        self._waiters: Set[Waiter] = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def current_position(self) -> Position:
+        """The position a new subscriber starts following from."""
+        with self._condition:
+            if self._position is not None:
+                return self._position
+        # Nothing has been seen yet: start from "now" rather than replaying history
+        return (int(time.time() * 1000), "")
+
+    def subscribe(
+        self, waiter: Optional[Waiter] = None, *, status: bool = True
+    ) -> None:
+        """
+        Start following changes; the polling thread runs while anyone is subscribed.
+
+        Pass ``status=False`` if the subscriber never reads the aggregate
+        counts, so the feed does not count workflows by status on its behalf.
+        """
+        with self._condition:
+            self._subscribers += 1
+            if status:
+                self._status_subscribers += 1
+                if self._status_subscribers == 1:
+                    # Not kept up to date while nobody wanted it
+                    self._status = None
+            if waiter is not None:
+                self._waiters.add(waiter)
+            if self._thread is None or not self._thread.is_alive():
+                if self._position is None:
+                    self._position = self._floor = (int(time.time() * 1000), "")
+                self._thread = threading.Thread(
+                    target=self._run, name="workflow-change-feed", daemon=True
+                )
+                self._thread.start()
+
+    def unsubscribe(
+        self, waiter: Optional[Waiter] = None, *, status: bool = True
+    ) -> None:
+        with self._condition:
+            self._subscribers -= 1
+            if status:
+                self._status_subscribers -= 1
+            if waiter is not None:
+                self._waiters.discard(waiter)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._subscribers <= 0:
+                    self._thread = None
+                    return
+                position = self._position
+                with_status = self._status_subscribers > 0
+            try:
+                self._poll(position, with_status)
+            except Exception as e:
+                logger.warning("workflow_feed_poll_failed", error=str(e))
+            time.sleep(self.poll_interval)
+
+    def _changes(self, position: Position) -> List[Dict[str, Any]]:
+        return workflow_queries.list_workflow_changes(
+            after=position,
+            limit=CHANGE_BATCH_SIZE,
+            created_after=datetime.now(timezone.utc) - self.window,
+            settle_ms=CHANGE_SETTLE_MS,
+        )
+
+    def _poll(self, position: Position, with_status: bool = True) -> None:
+        rows = self._changes(position)
+        if rows:
+            self._status_stale = True
+        status = None
+        now = time.monotonic()
+        if with_status and (
+            self._status is None or (self._status_stale and now >= self._status_due)
+        ):
+            counts, queued = workflow_queries.count_workflows_by_status(
+                start_time=datetime.now(timezone.utc) - self.status_window
+            )
+            status = {
+                "counts": counts,
+                "total_workflows": sum(counts.values()),
+                "queued_workflows": queued,
+            }
+            self._status_stale = False
+            self._status_due = now + self.status_interval
+
+        with self._condition:
+            for row in rows:
+                row_position = (row["updated_at"], row["workflow_uuid"])
+                if len(self._backlog) == self._backlog.maxlen:
+                    self._floor = self._backlog[0][0]
+                self._backlog.append((row_position, _workflow_event(row)))
+                self._position = row_position
+            if status is not None:
+                self._status = status
+                self._status_version += 1
+            if rows or status is not None:
+                self._condition.notify_all()
+                for loop, event in list(self._waiters):
+                    try:
+                        loop.call_soon_threadsafe(event.set)
+                    except RuntimeError:
+                        # The subscriber's event loop has already closed
+                        self._waiters.discard((loop, event))
+
+    def _backlog_after(self, position: Position) -> Optional[Events]:
+        """Events newer than ``position``, or ``None`` if the backlog no longer covers it."""
+        if self._floor is None or position < self._floor:
+            return None
+        return [(pos, event) for pos, event in self._backlog if pos > position]
+
+    def _catch_up(self, position: Position) -> Events:
+        """Read changes after ``position`` straight from the database."""
+        rows = self._changes(position)
+        return [
+            ((row["updated_at"], row["workflow_uuid"]), _workflow_event(row))
+            for row in rows
+        ]
+
+    def _start_position(self, last_event_id: Optional[str]) -> Position:
+        position = self.current_position()
+        if last_event_id:
+            try:
+                position = workflow_queries.decode_cursor(last_event_id)
+            except ValueError:
+                logger.info(
+                    "workflow_feed_bad_last_event_id", last_event_id=last_event_id
+                )
+        return position
+
+    def _take(
+        self, position: Position, status_version: int, timeout: Optional[float] = None
+    ) -> Tuple[Optional[Events], Any, int, Optional[Position]]:
+        """
+        Collect what a subscriber at ``position`` has not seen yet.
+
+        With a ``timeout``, blocks until something new arrives or the timeout
+        expires. Returns the pending events (``None`` if the backlog no longer
+        covers ``position``), the new status if it changed, the status version
+        and the backlog floor.
+        """
+        with self._condition:
+            events = self._backlog_after(position)
+            if timeout and events == [] and self._status_version == status_version:
+                self._condition.wait(timeout=timeout)
+                events = self._backlog_after(position)
+            status = None
+            if self._status_version != status_version:
+                status, status_version = self._status, self._status_version
+            return events, status, status_version, self._floor
+
+    def _render(
+        self, position: Position, events: Events, status: Any
+    ) -> Tuple[Position, List[str]]:
+        messages = []
+        for event_position, event in events:
+            position = max(position, event_position)
+            messages.append(
+                format_sse(
+                    "workflow",
+                    event,
+                    event_id=workflow_queries.encode_cursor(*event_position),
+                )
+            )
+        if status is not None:
+            messages.append(format_sse("status", status))
+        if not messages:
+            messages.append(": keep-alive\n\n")
+        return position, messages
+
+    def stream(self, last_event_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Yield SSE messages for workflow changes after ``last_event_id``.
+
+        Emits ``workflow`` events (one per state change, with the change
+        position as the event ID) and ``status`` events with aggregate counts.
+        Blocks the calling thread between messages; use ``astream`` under ASGI.
+        """
+        self.subscribe()
+        try:
+            position = self._start_position(last_event_id)
+            yield "retry: 3000\n\n"
+            status_version = -1
+            while True:
+                events, status, status_version, floor = self._take(
+                    position, status_version, timeout=HEARTBEAT_SECONDS
+                )
+                if events is None:
+                    # Client is further behind than the backlog: catch up from the database
+                    events = self._catch_up(position)
+                    if len(events) < CHANGE_BATCH_SIZE and floor is not None:
+                        # Fully caught up; everything after the floor is in the backlog
+                        position = max(position, floor)
+                position, messages = self._render(position, events, status)
+                yield from messages
+        finally:
+            self.unsubscribe()
+
+    async def astream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Async variant of ``stream`` that waits on the event loop, not a thread.
+
+        The polling thread wakes each subscriber through an ``asyncio.Event``,
+        so an idle connection costs a coroutine rather than a blocked thread.
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        wakeup = waiter[1]
+        self.subscribe(waiter)
+        try:
+            position = self._start_position(last_event_id)
+            yield "retry: 3000\n\n"
+            status_version = -1
+            while True:
+                wakeup.clear()
+                events, status, status_version, floor = self._take(
+                    position, status_version
+                )
+                if events == [] and status is None:
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    events, status, status_version, floor = self._take(
+                        position, status_version
+                    )
+                if events is None:
+                    events = await asyncio.to_thread(self._catch_up, position)
+                    if len(events) < CHANGE_BATCH_SIZE and floor is not None:
+                        position = max(position, floor)
+                position, messages = self._render(position, events, status)
+                for message in messages:
+                    yield message
+        finally:
+            self.unsubscribe(waiter)
+
+    async def wait_for_workflow(
+        self,
+        workflow_id: str,
+        done: Callable[[], Awaitable[bool]],
+        timeout: float,
+    ) -> bool:
+        """
+        Wait until ``done()`` is true, re-checking it only when ``workflow_id`` changes.
+
+        ``done`` is checked once up front, again whenever the feed reports a
+        change to the workflow, and a last time when ``timeout`` expires, so a
+        waiter costs a handful of queries however long it waits. Waiters do
+        not need the aggregate counts, so while only waiters are subscribed
+        the feed polls for changes alone.
+
+        Returns:
+            The last result of ``done()``.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = (loop, asyncio.Event())
+        wakeup = waiter[1]
+        # Subscribe before the first check so no change can slip in between
+        self.subscribe(waiter, status=False)
+        try:
+            position = self.current_position()
+            if await done():
+                return True
+            deadline = loop.time() + timeout
+            while True:
+                wakeup.clear()
+                with self._condition:
+                    events = self._backlog_after(position)
+                if events is None:
+                    # Too much changed to tell what; check directly
+                    position = self.current_position()
+                    if await done():
+                        return True
+                elif events:
+                    position = events[-1][0]
+                    if any(
+                        event["workflow_id"] == workflow_id for _, event in events
+                    ) and await done():
+                        return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return await done()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return await done()
+        finally:
+            self.unsubscribe(waiter, status=False)
+
+
+_feed: Optional[WorkflowChangeFeed] = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> WorkflowChangeFeed:
+    """Return the process-wide change feed, creating it on first use."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = WorkflowChangeFeed(
+                poll_interval=getattr(settings, "WORKFLOW_STREAM_POLL_INTERVAL", 1.0),
+                window=timedelta(
+                    hours=getattr(settings, "WORKFLOW_STREAM_WINDOW_HOURS", 24)
+                ),
+                status_interval=getattr(
+                    settings, "WORKFLOW_STREAM_STATUS_INTERVAL", 5.0
+                ),
+                status_window=timedelta(
+                    hours=getattr(settings, "WORKFLOW_STATUS_WINDOW_HOURS", 24)
+                ),
+            )
+        return _feed
@@ -0,0 +1,776 @@
+"""
+Set-based queries over the DBOS system tables.
+
+DBOS's public helpers (``DBOS.list_workflows`` and friends) materialise a full
+``WorkflowStatus`` object per row, including deserialised inputs and outputs.
+That is fine for a handful of workflows but not for listing or counting
+hundreds of thousands of them, so the helpers here query the system database
+directly with SQLAlchemy Core and only select the columns they need.
+
+The system tables are not part of DBOS's public API, so this module only
+works with the DBOS versions pinned in pyproject.toml. Everything it reaches
+into DBOS for goes through the imports below and ``_system_database``, which
+fail with an explicit error on a DBOS that no longer provides them.
+"""
+
+import base64
+import binascii
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from dbos import DBOS
+
+try:
+    from dbos._dbos import _get_dbos_instance
+    from dbos._schemas.system_database import SystemSchema
+    from dbos._serialization import safe_deserialize
+except ImportError as e:  # pragma: no cover - depends on the installed DBOS
+    raise ImportError(
+        "core.workflow_queries needs DBOS's system tables, which the installed "
+        "dbos does not provide; install the version pinned in pyproject.toml"
+    ) from e
+
+workflow_status = SystemSchema.workflow_status
+operation_outputs = SystemSchema.operation_outputs
+
+# Columns needed to render a workflow row; never includes inputs or outputs
+SUMMARY_COLUMNS = (
+    workflow_status.c.workflow_uuid,
+    workflow_status.c.name,
+    workflow_status.c.status,
+    workflow_status.c.created_at,
+    workflow_status.c.updated_at,
+    workflow_status.c.application_version,
+)
+
+TERMINAL_STATUSES = (
+    "SUCCESS",
+    "ERROR",
+    "CANCELLED",
+    "MAX_RECOVERY_ATTEMPTS_EXCEEDED",
+)
+
+# Statuses of workflows that ran to completion, successfully or not
+FINISHED_STATUSES = ("SUCCESS", "ERROR", "MAX_RECOVERY_ATTEMPTS_EXCEEDED")
+ERROR_STATUSES = ("ERROR", "MAX_RECOVERY_ATTEMPTS_EXCEEDED")
+
+# Percentiles reported by ``workflow_metrics``
+METRIC_PERCENTILES = (50, 95, 99)
+
+# Statuses a workflow can be cancelled from
+CANCELLABLE_STATUSES = ("PENDING", "ENQUEUED")
+
+# Upper bound on IDs bound into a single IN (...) clause
+ID_CHUNK_SIZE = 1000
+
+
+def _system_database() -> Any:
+    # DBOS's internal handle on its system database (DBOSException before launch)
+    sys_db = getattr(_get_dbos_instance(), "_sys_db", None)
+    if sys_db is None:
+        raise RuntimeError(
+            "DBOS does not expose its system database; install the dbos version "
+            "pinned in pyproject.toml"
+        )
+    return sys_db
+
+
+def get_engine() -> sa.Engine:
+    """
+    Return the SQLAlchemy engine DBOS uses for its system database.
+
+    The engine carries DBOS's schema translation map, so ``SystemSchema``
+    tables resolve to the configured system schema on both Postgres and SQLite.
+
+    Raises:
+        RuntimeError: If the installed DBOS does not expose the engine.
+    """
+    engine = getattr(_system_database(), "engine", None)
+    if not isinstance(engine, sa.Engine):
+        raise RuntimeError(
+            "DBOS does not expose its system database engine; install the dbos "
+            "version pinned in pyproject.toml"
+        )
+    return engine
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Convert a datetime to the epoch milliseconds DBOS stores timestamps as."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def from_epoch_ms(value: Optional[int]) -> Optional[datetime]:
+    """Convert a DBOS epoch-millisecond timestamp to an aware UTC datetime."""
+    if not value:
+        return None
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+
+
+def encode_cursor(created_at: int, workflow_id: str) -> str:
+    """Encode a (created_at, workflow_id) keyset position as an opaque cursor."""
+    raw = f"{created_at}:{workflow_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, workflow_id = (
+            base64.urlsafe_b64decode(padded).decode().split(":", 1)
+        )
+        return int(created_at), workflow_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def apply_workflow_filters(
+    query: sa.Select,
+    *,
+    status: Optional[Sequence[str]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    workflow_id_prefix: Optional[str] = None,
+) -> sa.Select:
+    """Narrow a ``workflow_status`` query by status, name, creation window and ID prefix."""
+    ws = workflow_status
+    if status:
+        query = query.where(ws.c.status.in_(list(status)))
+    if name:
+        query = query.where(ws.c.name == name)
+    if start_time:
+        query = query.where(ws.c.created_at >= to_epoch_ms(start_time))
+    if end_time:
+        query = query.where(ws.c.created_at < to_epoch_ms(end_time))
+    if workflow_id_prefix:
+        query = query.where(
+            ws.c.workflow_uuid.startswith(workflow_id_prefix, autoescape=True)
+        )
+    return query
+
+
+def list_workflow_page(
+    *,
+    limit: int,
+    cursor: Optional[str] = None,
+    status: Optional[Sequence[str]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    workflow_id_prefix: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of workflows, newest first, using keyset pagination.
+
+    Only the summary columns are selected; workflow inputs and outputs are
+    never loaded.
+
+    Returns:
+        The page rows and the cursor for the next page (``None`` on the last page).
+    """
+    ws = workflow_status
+    query = sa.select(*SUMMARY_COLUMNS)
+    query = apply_workflow_filters(
+        query,
+        status=status,
+        name=name,
+        start_time=start_time,
+        end_time=end_time,
+        workflow_id_prefix=workflow_id_prefix,
+    )
+    if cursor:
+        created_at, workflow_id = decode_cursor(cursor)
+        query = query.where(
+            sa.or_(
+                ws.c.created_at < created_at,
+                sa.and_(
+                    ws.c.created_at == created_at,
+                    ws.c.workflow_uuid < workflow_id,
+                ),
+            )
+        )
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(ws.c.created_at.desc(), ws.c.workflow_uuid.desc()).limit(
+        limit + 1
+    )
+
+    with get_engine().connect() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(query)]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["created_at"], last["workflow_uuid"])
+    return rows, next_cursor
+
+
+def iter_workflows(
+    *,
+    batch_size: int = 1000,
+    status: Optional[Sequence[str]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every matching workflow, oldest first, through a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time (a named cursor on Postgres), so
+    memory stays flat however much history matches. The connection is held
+    until the generator is exhausted or closed.
+    """
+    ws = workflow_status
+    query = sa.select(
+        *SUMMARY_COLUMNS, ws.c.queue_name, ws.c.started_at_epoch_ms
+    ).order_by(ws.c.created_at, ws.c.workflow_uuid)
+    query = apply_workflow_filters(
+        query, status=status, name=name, start_time=start_time, end_time=end_time
+    )
+
+    with get_engine().connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=batch_size
+        ).execute(query)
+        for row in result:
+            yield dict(row._mapping)
+
+
+def count_workflows_by_status(
+    *,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+) -> Tuple[Dict[str, int], int]:
+    """
+    Count workflows per status with a single ``GROUP BY`` query.
+
+    The query reads every workflow created in the window, through the
+    ``created_at`` index; without ``start_time`` it reads the whole
+    ``workflow_status`` table, which grows with every workflow kept. Callers
+    that poll should pass a window (see ``WORKFLOW_STATUS_WINDOW_HOURS``).
+
+    Returns:
+        A mapping of status to exact count, and the number of workflows that
+        are currently waiting on or running from a queue.
+    """
+    ws = workflow_status
+    queued = sa.func.sum(
+        sa.case(
+            (
+                sa.and_(
+                    ws.c.queue_name.is_not(None),
+                    ws.c.status.in_(["ENQUEUED", "PENDING"]),
+                ),
+                1,
+            ),
+            else_=0,
+        )
+    )
+    query = sa.select(ws.c.status, sa.func.count(), queued).group_by(ws.c.status)
+    query = apply_workflow_filters(query, start_time=start_time, end_time=end_time)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(query).all()
+
+    counts = {status: count for status, count, _ in rows}
+    queued_count = sum(int(queued or 0) for _, _, queued in rows)
+    return counts, queued_count
+
+
+def queue_stats(
+    limiter_periods: Dict[str, Optional[float]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Measure depth and recent starts for the given queues with one ``GROUP BY`` query.
+
+    Args:
+        limiter_periods: Queue name to the period, in seconds, of its rate
+            limiter (``None`` for queues without one)
+
+    Returns:
+        Per queue: workflows ``enqueued`` and ``running``, the creation time
+        of the oldest enqueued workflow (``oldest_enqueued_at``, epoch ms) and
+        how many workflows started within the limiter period
+        (``started_in_period``), counted the way DBOS's rate limiter does.
+    """
+    ws = workflow_status
+    now_ms = to_epoch_ms(datetime.now(timezone.utc))
+    cutoffs = {
+        name: now_ms - int(period * 1000)
+        for name, period in limiter_periods.items()
+        if period
+    }
+    started_recently = sa.or_(
+        sa.false(),
+        *(
+            sa.and_(ws.c.queue_name == name, ws.c.started_at_epoch_ms > cutoff)
+            for name, cutoff in cutoffs.items()
+        ),
+    )
+    started_in_period = sa.and_(ws.c.status != "ENQUEUED", started_recently)
+
+    query = (
+        sa.select(
+            ws.c.queue_name,
+            sa.func.sum(sa.case((ws.c.status == "ENQUEUED", 1), else_=0)),
+            sa.func.sum(sa.case((ws.c.status == "PENDING", 1), else_=0)),
+            sa.func.min(
+                sa.case((ws.c.status == "ENQUEUED", ws.c.created_at), else_=None)
+            ),
+            sa.func.sum(sa.case((started_in_period, 1), else_=0)),
+        )
+        .where(ws.c.queue_name.in_(list(limiter_periods)))
+        .where(sa.or_(ws.c.status.in_(["ENQUEUED", "PENDING"]), started_recently))
+        .group_by(ws.c.queue_name)
+    )
+
+    stats = {
+        name: {
+            "enqueued": 0,
+            "running": 0,
+            "oldest_enqueued_at": None,
+            "started_in_period": 0,
+        }
+        for name in limiter_periods
+    }
+    with get_engine().connect() as conn:
+        for name, enqueued, running, oldest, started in conn.execute(query):
+            stats[name] = {
+                "enqueued": int(enqueued or 0),
+                "running": int(running or 0),
+                "oldest_enqueued_at": oldest,
+                "started_in_period": int(started or 0),
+            }
+    return stats
+
+
+def _percentile(value: Any, rank: Any, count: Any, percentile: int) -> Any:
+    # Nearest-rank percentile: the first value whose rank reaches percentile% of the count
+    return sa.func.min(sa.case((rank * 100 >= count * percentile, value), else_=None))
+
+
+def workflow_metrics(
+    *,
+    start_time: datetime,
+    end_time: datetime,
+    name: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compute latency and outcome statistics per workflow name in one query.
+
+    Covers workflows created in [start_time, end_time) that have finished
+    (SUCCESS, ERROR or MAX_RECOVERY_ATTEMPTS_EXCEEDED). Queue wait is the
+    time from creation to being dequeued and is only defined for queued
+    workflows; execution time runs from start (or creation, if never queued)
+    to the last status update. Percentiles are nearest-rank, computed with
+    window functions so the same SQL runs on Postgres and SQLite.
+
+    Returns:
+        One row per workflow name with ``completed`` and ``errors`` counts and
+        ``wait_p50``/``exec_p50``-style percentiles in milliseconds.
+    """
+    ws = workflow_status
+    started_at = sa.func.coalesce(ws.c.started_at_epoch_ms, ws.c.created_at)
+    finished = apply_workflow_filters(
+        sa.select(
+            ws.c.name,
+            ws.c.status,
+            (ws.c.started_at_epoch_ms - ws.c.created_at).label("wait_ms"),
+            # updated_at only has second precision on SQLite, so clamp at zero
+            sa.case(
+                (ws.c.updated_at > started_at, ws.c.updated_at - started_at),
+                else_=0,
+            ).label("exec_ms"),
+        ).where(ws.c.status.in_(FINISHED_STATUSES)),
+        name=name,
+        start_time=start_time,
+        end_time=end_time,
+    ).subquery()
+
+    by_name = {"partition_by": finished.c.name}
+    ranked = sa.select(
+        finished,
+        sa.func.row_number()
+        .over(order_by=finished.c.wait_ms.nulls_last(), **by_name)
+        .label("wait_rank"),
+        sa.func.count(finished.c.wait_ms).over(**by_name).label("wait_count"),
+        sa.func.row_number()
+        .over(order_by=finished.c.exec_ms, **by_name)
+        .label("exec_rank"),
+        sa.func.count().over(**by_name).label("exec_count"),
+    ).subquery()
+
+    columns = [
+        ranked.c.name,
+        sa.func.count().label("completed"),
+        sa.func.sum(
+            sa.case((ranked.c.status.in_(ERROR_STATUSES), 1), else_=0)
+        ).label("errors"),
+    ]
+    for p in METRIC_PERCENTILES:
+        columns.append(
+            _percentile(
+                ranked.c.wait_ms, ranked.c.wait_rank, ranked.c.wait_count, p
+            ).label(f"wait_p{p}")
+        )
+        columns.append(
+            _percentile(
+                ranked.c.exec_ms, ranked.c.exec_rank, ranked.c.exec_count, p
+            ).label(f"exec_p{p}")
+        )
+    query = sa.select(*columns).group_by(ranked.c.name).order_by(ranked.c.name)
+
+    with get_engine().connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query)]
+
+
+def _now_ms_sql(engine: sa.Engine) -> sa.ColumnElement[int]:
+    # The database clock, which DBOS stamps created_at and updated_at with
+    if engine.dialect.name == "sqlite":
+        return sa.cast(
+            (sa.func.julianday("now") - 2440587.5) * 86400000, sa.BigInteger
+        )
+    return sa.cast(sa.func.extract("epoch", sa.func.now()) * 1000, sa.BigInteger)
+
+
+def list_workflow_changes(
+    *,
+    after: Tuple[int, str],
+    limit: int,
+    created_after: Optional[datetime] = None,
+    settle_ms: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch workflows updated after a (updated_at, workflow_id) position, oldest first.
+
+    Used to follow workflow state changes: the last row returned becomes the
+    ``after`` position of the next call. ``updated_at`` is not indexed, so
+    pass ``created_after`` to bound the scan with the ``created_at`` index;
+    changes to older workflows are then not reported. DBOS stamps a change
+    when its transaction starts, so one can commit after later-stamped ones;
+    changes stamped less than ``settle_ms`` ago by the database clock are
+    left for a later call, so the position does not move past them.
+    """
+    ws = workflow_status
+    engine = get_engine()
+    updated_at, workflow_id = after
+    query = (
+        sa.select(*SUMMARY_COLUMNS)
+        .where(
+            sa.or_(
+                ws.c.updated_at > updated_at,
+                sa.and_(
+                    ws.c.updated_at == updated_at,
+                    ws.c.workflow_uuid > workflow_id,
+                ),
+            )
+        )
+        .order_by(ws.c.updated_at, ws.c.workflow_uuid)
+        .limit(limit)
+    )
+    if created_after:
+        query = query.where(ws.c.created_at >= to_epoch_ms(created_after))
+    if settle_ms:
+        query = query.where(ws.c.updated_at <= _now_ms_sql(engine) - settle_ms)
+
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query)]
+
+
+def get_workflow_outcomes(
+    workflow_ids: Sequence[str], *, only_terminal: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Fetch status, timestamps and deserialised output/error for many workflows at once.
+
+    Outputs are decoded by DBOS itself: IDs are looked up with
+    ``DBOS.list_workflows`` in chunks of up to ``ID_CHUNK_SIZE``, each one
+    ``IN (...)`` query, without loading inputs. Unknown IDs are simply absent
+    from the result.
+
+    Args:
+        workflow_ids: The workflows to look up
+        only_terminal: Skip workflows that have not finished yet
+    """
+    workflow_ids = list(dict.fromkeys(workflow_ids))
+    rows: List[Dict[str, Any]] = []
+    for start in range(0, len(workflow_ids), ID_CHUNK_SIZE):
+        statuses = DBOS.list_workflows(
+            workflow_ids=workflow_ids[start : start + ID_CHUNK_SIZE],
+            status=list(TERMINAL_STATUSES) if only_terminal else None,
+            load_input=False,
+        )
+        rows.extend(
+            {
+                "workflow_uuid": status.workflow_id,
+                "name": status.name,
+                "status": status.status,
+                "created_at": status.created_at,
+                "updated_at": status.updated_at,
+                "output": status.output,
+                "error": str(status.error) if status.error is not None else None,
+            }
+            for status in statuses
+        )
+    return rows
+
+
+def _cancel(workflow_ids: Sequence[str]) -> int:
+    # Only the matching is set-based SQL here; the cancelling itself is left to
+    # DBOS.cancel_workflows, one UPDATE per call, so it stays exactly what DBOS
+    # does (dequeueing, completed_at, ...) whatever the DBOS version
+    if workflow_ids:
+        DBOS.cancel_workflows(list(workflow_ids))
+    return len(workflow_ids)
+
+
+def cancel_workflow_ids(workflow_ids: Sequence[str]) -> int:
+    """
+    Cancel those of the given workflows that are still cancellable.
+
+    Workflows that have already finished (or do not exist) are left alone.
+    Running workflows stop at their next step, as with ``DBOS.cancel_workflow``.
+
+    Returns:
+        The number of workflows that were cancellable and got cancelled.
+    """
+    ws = workflow_status
+    if not workflow_ids:
+        return 0
+    with get_engine().connect() as conn:
+        cancellable = list(
+            conn.execute(
+                sa.select(ws.c.workflow_uuid).where(
+                    ws.c.workflow_uuid.in_(list(workflow_ids)),
+                    ws.c.status.in_(CANCELLABLE_STATUSES),
+                )
+            ).scalars()
+        )
+    return _cancel(cancellable)
+
+
+def cancel_next_matching(
+    *,
+    limit: int,
+    after: Optional[Tuple[int, str]] = None,
+    exclude: Optional[str] = None,
+    status: Optional[Sequence[str]] = None,
+    name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    workflow_id_prefix: Optional[str] = None,
+) -> Tuple[int, int, Optional[Tuple[int, str]]]:
+    """
+    Cancel the next chunk of up to ``limit`` cancellable workflows matching the filters.
+
+    Chunks are walked in (created_at, workflow_id) order; pass the returned
+    position as ``after`` to continue with the next chunk.
+
+    Returns:
+        The number of workflows matched and cancelled in this chunk (the
+        same, as only cancellable workflows match), and the position to
+        continue from (``None`` once nothing is left).
+    """
+    ws = workflow_status
+    statuses = [s for s in (status or CANCELLABLE_STATUSES) if s in CANCELLABLE_STATUSES]
+    if not statuses:
+        return 0, 0, None
+
+    query = sa.select(ws.c.workflow_uuid, ws.c.created_at)
+    query = apply_workflow_filters(
+        query,
+        status=statuses,
+        name=name,
+        start_time=start_time,
+        end_time=end_time,
+        workflow_id_prefix=workflow_id_prefix,
+    )
+    if exclude:
+        query = query.where(ws.c.workflow_uuid != exclude)
+    if after:
+        created_at, workflow_id = after
+        query = query.where(
+            sa.or_(
+                ws.c.created_at > created_at,
+                sa.and_(
+                    ws.c.created_at == created_at,
+                    ws.c.workflow_uuid > workflow_id,
+                ),
+            )
+        )
+    query = query.order_by(ws.c.created_at, ws.c.workflow_uuid).limit(limit)
+
+    with get_engine().connect() as conn:
+        rows = conn.execute(query).all()
+    if not rows:
+        return 0, 0, None
+    cancelled = _cancel([row.workflow_uuid for row in rows])
+    last = rows[-1]
+    return len(rows), cancelled, (last.created_at, last.workflow_uuid)
+
+
+def _workflow_children() -> List[Tuple[sa.Table, sa.Column]]:
+    # Every system table with rows owned by a workflow, and the referencing column
+    return [
+        (table, fk.parent)
+        for table in SystemSchema.metadata_obj.sorted_tables
+        for fk in table.foreign_keys
+        if fk.column.table is workflow_status
+    ]
+
+
+def _payload_bytes(*columns: Any) -> Any:
+    return sa.func.coalesce(
+        sa.func.sum(sum(sa.func.coalesce(sa.func.length(c), 0) for c in columns)), 0
+    )
+
+
+def delete_expired_workflows(
+    *,
+    limit: int,
+    created_before: int,
+    status: Sequence[str],
+    name: Optional[str] = None,
+    exclude_names: Sequence[str] = (),
+) -> Tuple[int, int]:
+    """
+    Delete up to ``limit`` of the oldest finished workflows created before a cutoff.
+
+    ``created_before`` is in epoch milliseconds. Only terminal statuses are
+    ever deleted, together with their steps, events, notifications and
+    streams. Each call is one short transaction, so retention never holds
+    locks for long.
+
+    Returns:
+        The number of workflows deleted and the size of the inputs, outputs
+        and errors they and their steps stored (string length, so approximate).
+    """
+    ws = workflow_status
+    oo = operation_outputs
+    statuses = [s for s in status if s in TERMINAL_STATUSES]
+    if not statuses:
+        return 0, 0
+
+    query = sa.select(ws.c.workflow_uuid).where(
+        ws.c.status.in_(statuses), ws.c.created_at < created_before
+    )
+    if name:
+        query = query.where(ws.c.name == name)
+    if exclude_names:
+        query = query.where(ws.c.name.not_in(list(exclude_names)))
+    query = query.order_by(ws.c.created_at).limit(min(limit, ID_CHUNK_SIZE))
+
+    with get_engine().begin() as conn:
+        workflow_ids = list(conn.execute(query).scalars())
+        if not workflow_ids:
+            return 0, 0
+        reclaimed = conn.execute(
+            sa.select(_payload_bytes(ws.c.inputs, ws.c.output, ws.c.error)).where(
+                ws.c.workflow_uuid.in_(workflow_ids)
+            )
+        ).scalar_one() + conn.execute(
+            sa.select(_payload_bytes(oo.c.output, oo.c.error)).where(
+                oo.c.workflow_uuid.in_(workflow_ids)
+            )
+        ).scalar_one()
+        # Postgres would cascade these, but DBOS does not enable foreign keys on SQLite
+        for table, column in _workflow_children():
+            conn.execute(sa.delete(table).where(column.in_(workflow_ids)))
+        conn.execute(sa.delete(ws).where(ws.c.workflow_uuid.in_(workflow_ids)))
+    return len(workflow_ids), int(reclaimed)
+
+
+def _decode(
+    serialization: Optional[str], workflow_id: str, output: Any, error: Any
+) -> Tuple[Any, Optional[Exception]]:
+    # Decoded as DBOS.list_workflow_steps does; safe_deserialize's signature is
+    # that of the dbos versions pinned in pyproject.toml
+    _, output, exception = safe_deserialize(
+        _system_database().serializer,
+        serialization,
+        workflow_id,
+        serialized_input=None,
+        serialized_output=output,
+        serialized_exception=error,
+    )
+    return output, exception
+
+
+def _step_row(row: sa.Row, workflow_id: str) -> Dict[str, Any]:
+    step = dict(row._mapping)
+    step["output"], step["error"] = _decode(
+        step.pop("serialization"), workflow_id, step["output"], step["error"]
+    )
+    return step
+
+
+def list_workflow_steps(workflow_id: str, *, max_output_size: int) -> List[Dict[str, Any]]:
+    """
+    Fetch a workflow's steps with every output larger than ``max_output_size`` left out.
+
+    Sizes are those of the serialised outputs. Outputs over the cap are never
+    read from the database; their steps report ``output_truncated`` and
+    ``output_size`` so the full output can be fetched on demand with
+    ``get_step_output``. Rows have the same keys as DBOS's ``StepInfo``.
+    """
+    oo = operation_outputs
+    output_size = sa.func.coalesce(sa.func.length(oo.c.output), 0)
+    query = (
+        sa.select(
+            oo.c.function_id,
+            oo.c.function_name,
+            sa.case((output_size <= max_output_size, oo.c.output)).label("output"),
+            oo.c.error,
+            oo.c.child_workflow_id,
+            oo.c.started_at_epoch_ms,
+            oo.c.completed_at_epoch_ms,
+            oo.c.serialization,
+            output_size.label("output_size"),
+        )
+        .where(oo.c.workflow_uuid == workflow_id)
+        .order_by(oo.c.function_id)
+    )
+    with get_engine().connect() as conn:
+        rows = conn.execute(query).all()
+
+    steps = []
+    for row in rows:
+        step = _step_row(row, workflow_id)
+        step["output_truncated"] = step["output_size"] > max_output_size
+        steps.append(step)
+    return steps
+
+
+def get_step_output(workflow_id: str, step_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one step of a workflow with its full output.
+
+    Returns:
+        The step, with the same keys as DBOS's ``StepInfo``, or ``None`` if
+        the workflow has no such step.
+    """
+    oo = operation_outputs
+    query = sa.select(
+        oo.c.function_id,
+        oo.c.function_name,
+        oo.c.output,
+        oo.c.error,
+        oo.c.child_workflow_id,
+        oo.c.started_at_epoch_ms,
+        oo.c.completed_at_epoch_ms,
+        oo.c.serialization,
+    ).where(oo.c.workflow_uuid == workflow_id, oo.c.function_id == step_id)
+    with get_engine().connect() as conn:
+        row = conn.execute(query).first()
+    if row is None:
+        return None
+    return _step_row(row, workflow_id)